@@ -10,15 +10,29 @@ from flask_migrate import Migrate
 from flask_moment import Moment
 from flask_sqlalchemy import SQLAlchemy
 from flask_whooshee import Whooshee
+from .http_client import HTTPClient
 from .models import db, AnonymousUser, whooshee
+from .play_catalog import PlayCatalog
+from .random_pool import RandomPool
+from .request_memo import RequestMemo
+from .response_cache import ResponseCache
+from .showcase import Showcase
+from .tasks import TaskQueue
 from sqlalchemy.sql import exists
 
 bootstrap = Bootstrap()
 cors = CORS()
+http_client = HTTPClient()
 login_manager = LoginManager()
 mail = Mail()
 migrate = Migrate()
 moment = Moment()
+play_catalog = PlayCatalog()
+random_pool = RandomPool()
+request_memo = RequestMemo()
+response_cache = ResponseCache()
+showcase = Showcase()
+task_queue = TaskQueue()
 
 def create_app(config_name):
     app = Flask(__name__)
@@ -35,10 +49,17 @@ def create_app(config_name):
     bootstrap.init_app(app)
     cors.init_app(app)
     db.init_app(app)
+    http_client.init_app(app)
     login_manager.init_app(app)
     mail.init_app(app)
     migrate.init_app(app, db)
     moment.init_app(app)
+    play_catalog.init_app(app)
+    random_pool.init_app(app)
+    request_memo.init_app(app)
+    response_cache.init_app(app)
+    showcase.init_app(app)
+    task_queue.init_app(app)
     whooshee.init_app(app)
 
     from .api import api as api_blueprint
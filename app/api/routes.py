@@ -2,7 +2,7 @@ from app import db
 from app.api import api
 from app.api.auth import token_auth
 from app.schemas import *
-from app.main.crud import add_interpretation, add_question, get_play_by_shortname, add_character
+from app.main.crud import add_interpretation, add_question, get_all_plays, get_play_by_id, get_play_by_shortname, add_character
 from app.main.forms import play_titles
 from app.models import *
 from flask import abort, jsonify, request
@@ -98,10 +98,10 @@ def api_get_plays(id=None):
     """Return play information in JSON format."""
 
     if id:
-        play = play_schema.dump(Play.query.get_or_404(id))
+        play = play_schema.dump(get_play_by_id(id) or abort(404))
         return {"play": play}
     else:
-        plays = plays_schema.dump(Play.query.all())
+        plays = plays_schema.dump(get_all_plays())
         return {"plays": plays}
 
 
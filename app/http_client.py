@@ -0,0 +1,230 @@
+"""Shared HTTP client used for all requests to external APIs."""
+
+from .http_fixtures import RecordingAdapter, ReplayAdapter
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from functools import partial
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from urllib3.util.retry import Retry
+import random
+import requests
+import threading
+import time
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request to a host that has failed too many times in a row."""
+
+
+class TokenBucket:
+    """A thread-safe token bucket: allows `rate` requests per second on average, in bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold back every caller for the given number of seconds, as when the host answers 429 Too Many Requests."""
+
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+class CircuitBreaker:
+    """Stops requests to a host after `threshold` consecutive failures. Once `reset_timeout` seconds have passed the
+    circuit is half-open: one trial request is let through while every other caller is still turned away, and its
+    outcome closes the circuit or opens it for another `reset_timeout` seconds."""
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None # set while the half-open circuit's trial request is in flight
+        self.lock = threading.Lock()
+
+    def before_request(self, host):
+        """Raise CircuitOpenError if the circuit is open, unless the reset timeout has passed and no other caller
+        is already sending the trial request, in which case this caller becomes the trial."""
+
+        with self.lock:
+            if self.opened_at is None:
+                return
+            now = time.monotonic()
+            # A trial that never reported back (it raised something unexpected) stops blocking after a reset timeout
+            probing = self.probe_started_at is not None and now - self.probe_started_at < self.reset_timeout
+            if probing or now - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"{host} failed {self.failures} times in a row; not retrying for {self.reset_timeout} seconds")
+            self.probe_started_at = now
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_started_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probe_started_at = None
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+def retry_after_seconds(response):
+    """Given a response, return the delay in seconds requested by its Retry-After header, or None."""
+
+    retry_after = response.headers.get("Retry-After")
+    if not retry_after:
+        return None
+    if retry_after.isdigit():
+        return int(retry_after)
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class HTTPClient:
+    """A pooled, keep-alive requests session with per-host pool sizes, default timeouts, rate limits,
+    circuit breakers and retry with jittered exponential backoff."""
+
+    def __init__(self, app=None):
+        self.session = None
+        self.timeout = None
+        self.rate_limiters = {}
+        self.breakers = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Build the shared session from the app's HTTP_* configuration."""
+
+        self.timeout = (app.config["HTTP_CONNECT_TIMEOUT"], app.config["HTTP_READ_TIMEOUT"])
+        self.max_attempts = app.config["HTTP_MAX_ATTEMPTS"]
+        self.backoff_factor = app.config["HTTP_BACKOFF_FACTOR"]
+        self.backoff_max = app.config["HTTP_BACKOFF_MAX"]
+        self.breaker_threshold = app.config["HTTP_BREAKER_THRESHOLD"]
+        self.breaker_reset = app.config["HTTP_BREAKER_RESET"]
+
+        adapter_class = HTTPAdapter
+        if app.config["HTTP_RECORD_DIR"]:
+            adapter_class = partial(RecordingAdapter, app.config["HTTP_RECORD_DIR"], skip_statuses=RETRY_STATUSES)
+        self.session = self.make_session(pool_sizes=app.config["HTTP_POOL_SIZES"], adapter_class=adapter_class)
+        if app.config["HTTP_REPLAY_DIR"]:
+            # Answer every request from recorded fixtures instead of the network
+            replay_adapter = ReplayAdapter(app.config["HTTP_REPLAY_DIR"], latency=app.config["HTTP_REPLAY_LATENCY"],
+                                           jitter=app.config["HTTP_REPLAY_JITTER"])
+            self.session.adapters.clear()
+            self.session.mount("https://", replay_adapter)
+            self.session.mount("http://", replay_adapter)
+        self.rate_limiters = {host: TokenBucket(rate, capacity) for host, (rate, capacity) in app.config["HTTP_RATE_LIMITS"].items()}
+        self.breakers = {}
+        self.breakers_lock = threading.Lock()
+        app.extensions["http_client"] = self
+
+    @staticmethod
+    def make_retry():
+        """Return a urllib3 Retry policy that never retries, so HTTPClient.get owns every retry of a connection error,
+        timeout or error status, with its shared rate limits, circuit breakers and attempt count."""
+
+        return Retry(total=0, connect=0, read=0, status=0, raise_on_status=False)
+
+    @classmethod
+    def make_session(cls, pool_sizes, adapter_class=HTTPAdapter):
+        """Return a requests session with one connection pool per configured host."""
+
+        session = requests.Session()
+        retry = cls.make_retry()
+
+        default_adapter = adapter_class(max_retries=retry)
+        session.mount("https://", default_adapter)
+        session.mount("http://", default_adapter)
+
+        for host, pool_size in pool_sizes.items():
+            # pool_connections is the number of pools kept per adapter; pool_maxsize is the connections kept alive per pool
+            adapter = adapter_class(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+            session.mount(f"https://{host}/", adapter)
+
+        return session
+
+    def get_breaker(self, host):
+        with self.breakers_lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+            return self.breakers[host]
+
+    def backoff(self, attempt):
+        """Return a "full jitter" exponential backoff delay for the given attempt number."""
+
+        return random.uniform(0, min(self.backoff_max, self.backoff_factor * 2 ** attempt))
+
+    def get(self, url, **kwargs):
+        """Send a GET request through the shared session, applying the default timeouts, the host's rate limit
+        and circuit breaker, and retrying 429 and 5xx responses. Returns the last response received."""
+
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).hostname
+        rate_limiter = self.rate_limiters.get(host)
+        breaker = self.get_breaker(host)
+
+        for attempt in range(self.max_attempts):
+            last_attempt = attempt == self.max_attempts - 1
+            breaker.before_request(host)
+            if rate_limiter:
+                rate_limiter.acquire()
+
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                breaker.record_failure()
+                if last_attempt:
+                    raise
+                time.sleep(self.backoff(attempt))
+                continue
+
+            if response.status_code == 429: # we're going too fast, but the host is up
+                breaker.record_success()
+            elif response.status_code in RETRY_STATUSES:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+                return response
+            if last_attempt:
+                return response
+
+            delay = retry_after_seconds(response)
+            if delay is None:
+                delay = self.backoff(attempt)
+            delay = min(delay, self.backoff_max) # don't let a host park a worker thread for hours
+            if response.status_code == 429 and rate_limiter:
+                rate_limiter.pause(delay) # slow every worker thread down, not just this one
+            time.sleep(delay)
+
+        return response
@@ -0,0 +1,107 @@
+"""Transport adapters that record external API responses to fixture files and replay them offline."""
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib.parse import urlsplit
+from .response_cache import cache_key
+import hashlib
+import json
+import os
+import random
+import requests
+import time
+
+RECORDED_HEADERS = {"Content-Type", "ETag", "Last-Modified", "Retry-After"}
+
+
+class MissingFixtureError(LookupError):
+    """Raised when a replayed request has no recorded fixture, so a replay run never silently answers from nothing.
+    Deliberately not a requests.RequestException, which callers treat as a passing network failure."""
+
+
+def fixture_path(fixture_dir, url):
+    """Given a fixture directory and request URL, return the fixture file path for the URL with its API key removed."""
+
+    key = cache_key(url)
+    host = urlsplit(key).hostname
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(fixture_dir, host, f"{digest}.json")
+
+
+class RecordingAdapter(HTTPAdapter):
+    """An HTTPAdapter that also saves the final 2xx and 4xx responses it receives as JSON fixture files, except
+    responses with a status in skip_statuses (such as 429s that will be retried). 304s, redirects and server errors
+    have no body worth replaying, and an error never overwrites a recorded 2xx for the same URL."""
+
+    def __init__(self, fixture_dir, skip_statuses=(), **kwargs):
+        self.fixture_dir = fixture_dir
+        self.skip_statuses = skip_statuses
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if self.should_record(request, response):
+            self.record(request, response)
+        return response
+
+    def should_record(self, request, response):
+        status_code = response.status_code
+        if status_code in self.skip_statuses or not (200 <= status_code < 300 or 400 <= status_code < 500):
+            return False
+        if response.ok:
+            return True
+
+        path = fixture_path(self.fixture_dir, request.url)
+        if not os.path.exists(path):
+            return True
+        with open(path) as fixture_file:
+            return not 200 <= json.load(fixture_file)["status_code"] < 300
+
+    def record(self, request, response):
+        path = fixture_path(self.fixture_dir, request.url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fixture = {
+            "url": cache_key(request.url),
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": {name: value for name, value in response.headers.items() if name in RECORDED_HEADERS},
+            "encoding": response.encoding or "utf-8",
+            "body": response.text,
+        }
+        with open(path, "w") as fixture_file:
+            json.dump(fixture, fixture_file)
+
+
+class ReplayAdapter(BaseAdapter):
+    """A transport adapter that answers requests from recorded fixture files after an artificial latency,
+    so imports can be benchmarked without network access."""
+
+    def __init__(self, fixture_dir, latency=0, jitter=0):
+        super().__init__()
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.jitter = jitter
+
+    def send(self, request, **kwargs):
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+
+        path = fixture_path(self.fixture_dir, request.url)
+        if not os.path.exists(path):
+            raise MissingFixtureError(f"No recorded response for {cache_key(request.url)}: expected fixture {path}; "
+                                      "record it with HTTP_RECORD_DIR set")
+        with open(path) as fixture_file:
+            fixture = json.load(fixture_file)
+
+        response = requests.Response()
+        response.status_code = fixture["status_code"]
+        response.reason = fixture["reason"]
+        response.headers = CaseInsensitiveDict(fixture["headers"])
+        response.encoding = fixture["encoding"]
+        response._content = fixture["body"].encode(fixture["encoding"])
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
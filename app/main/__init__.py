@@ -1,6 +1,6 @@
 from flask import Blueprint
 main = Blueprint("main", __name__)
-from . import routes, errors
+from . import routes, errors, tasks
 from ..models import Permission
 
 @main.app_context_processor
@@ -0,0 +1,109 @@
+"""Functions for importing many MovieDB films at once from the command line."""
+
+from app import db
+from app.main.crud import add_imported_film, get_play_by_id, get_play_by_shortname, seed_play
+from app.main.moviedb_parser import get_moviedb_film_id, parse_moviedb_film
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import current_app
+from mergedeep import merge
+import time
+
+
+def read_film_list(path):
+    """Given the path of a film list file, return a list of (MovieDB ID, play shortname) tuples and a list of
+    (line number, line, error) tuples for lines that couldn't be read. Each line holds a MovieDB film ID or URL and a
+    play shortname separated by whitespace or a comma; blank lines and # comments are ignored."""
+
+    films = []
+    bad_lines = []
+    with open(path) as film_list:
+        for number, line in enumerate(film_list, start=1):
+            fields = line.split("#")[0].replace(",", " ").split()
+            if not fields:
+                continue
+            if len(fields) != 2:
+                bad_lines.append((number, line.strip(), "expected a MovieDB film ID or URL and a play shortname"))
+                continue
+
+            film, shortname = fields
+            if film.startswith("http"):
+                try:
+                    film = get_moviedb_film_id(film)
+                except TypeError: # not a MovieDB film URL
+                    film = None
+            if not film or not film.isdigit():
+                bad_lines.append((number, line.strip(), "not a MovieDB film ID or URL"))
+                continue
+            films.append((film, shortname))
+
+    return films, bad_lines
+
+
+def fetch_film(app, moviedb_id, play_id):
+    """Given the app, a MovieDB film ID and play ID, fetch the film from MovieDB in its own app context and thread-local
+    database session. Return a dictionary with the parsed details and people, or the error, and the time taken."""
+
+    start = time.perf_counter()
+    with app.app_context():
+        try:
+            play = get_play_by_id(play_id)
+            details, cast, crew = parse_moviedb_film(moviedb_id, play)
+            return {"details": details, "people": merge({}, cast, crew), "fetch_time": time.perf_counter() - start}
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}", "fetch_time": time.perf_counter() - start}
+        finally:
+            db.session.remove()
+
+
+def import_films(films, workers=4, part_policy="close"):
+    """Given a list of (MovieDB ID, play shortname) tuples, fetch the films concurrently and write each one with 
+    batched inserts as soon as it arrives, in the order the fetches finish. Return a list of per-film report dictionaries."""
+
+    app = current_app._get_current_object()
+    report = []
+
+    plays = {}
+    unseeded_plays = {} # shortname: why seeding failed
+    for moviedb_id, shortname in films:
+        if shortname in unseeded_plays:
+            report.append({"moviedb_id": moviedb_id, "play": shortname, "error": unseeded_plays[shortname]})
+            continue
+        play = get_play_by_shortname(shortname)
+        if not play:
+            report.append({"moviedb_id": moviedb_id, "play": shortname, "error": "Unknown play shortname"})
+            continue
+        if shortname not in plays and not play.characters and not play.scenes:
+            try:
+                seed_play(play)
+            except Exception as e:
+                db.session.rollback()
+                unseeded_plays[shortname] = f"Couldn't seed play: {type(e).__name__}: {e}"
+                report.append({"moviedb_id": moviedb_id, "play": shortname, "error": unseeded_plays[shortname]})
+                continue
+        plays[shortname] = play
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        fetches = {executor.submit(fetch_film, app, moviedb_id, plays[shortname].id): (moviedb_id, shortname)
+                   for moviedb_id, shortname in films if shortname in plays}
+
+        for fetch in as_completed(fetches):
+            moviedb_id, shortname = fetches[fetch]
+            result = fetch.result()
+            row = {"moviedb_id": moviedb_id, "play": shortname, "fetch_time": result["fetch_time"]}
+            if "error" in result:
+                row["error"] = result["error"]
+                report.append(row)
+                continue
+
+            start = time.perf_counter()
+            try:
+                film = add_imported_film(plays[shortname], result["details"], result["people"], part_policy=part_policy)
+                row["title"] = film.title
+                row["people"] = len(result["people"])
+            except Exception as e:
+                db.session.rollback()
+                row["error"] = f"{type(e).__name__}: {e}"
+            row["write_time"] = time.perf_counter() - start
+            report.append(row)
+
+    return report
@@ -1,13 +1,56 @@
 from werkzeug.utils import ImportStringError
-from app import db
+from app import db, play_catalog, random_pool, request_memo
 from app.main.folger_parser import parse_folger_characters, parse_folger_scene_descriptions, parse_folger_scenes
 from app.main.forms import *
 from app.main.moviedb_parser import parse_moviedb_film_details
 from app.models import *
+from contextlib import contextmanager
+from datetime import date, datetime
+from flask import current_app
+from flask_whooshee import Whooshee
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.sql import exists
 from werkzeug.security import generate_password_hash
+import difflib
 import random
 
+# ----- BEGIN: UNIT OF WORK FUNCTIONS ----- #
+# For grouping many CRUD calls into one transaction
+
+@contextmanager
+def batch():
+    """Group the CRUD calls made inside the block into a single transaction. Inside a batch, the add/get/update
+    functions flush instead of committing, so new records still get their IDs; the outermost batch commits once
+    when the block finishes, or rolls everything back if it raises. Batches can be nested."""
+
+    info = db.session.info
+    info["batch_depth"] = info.get("batch_depth", 0) + 1
+    try:
+        yield db.session
+        if info["batch_depth"] == 1:
+            db.session.commit()
+    except BaseException:
+        if info["batch_depth"] == 1:
+            db.session.rollback()
+        raise
+    finally:
+        info["batch_depth"] -= 1
+
+
+def commit_changes():
+    """Commit the session, or only flush it if called inside a batch."""
+
+    if db.session.info.get("batch_depth"):
+        db.session.flush()
+    else:
+        db.session.commit()
+
+# ----- END: UNIT OF WORK FUNCTIONS ----- #
+
+
 # ----- BEGIN USER AUTHENTICATION FUNCTIONS ----- #
 
 def create_user(email, username, password=None, password_hash=None, name=None, about=None):
@@ -17,7 +60,7 @@ def create_user(email, username, password=None, password_hash=None, name=None, a
         password_hash = generate_password_hash(password)
     user = User(email=email, username=username, password_hash=password_hash, name=name, about=about)
     db.session.add(user)
-    db.session.commit()
+    commit_changes()
 
     return user
 
@@ -80,7 +123,7 @@ def add_character(name, play, gender=None, word_count=None, img=None):
     character = Character(name=name, gender=gender, play_id=play.id, word_count=word_count, img=img)
 
     db.session.add(character)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {character} *********")
     return character
@@ -91,11 +134,10 @@ def add_all_characters(play):
 
     characters = parse_folger_characters(play)
 
-    for character_name, word_count in characters.values():
-        character = get_character(name=character_name, play=play, word_count=word_count)
-        db.session.add(character)
-    
-    db.session.commit()
+    with batch():
+        for character_name, word_count in characters.values():
+            character = get_character(name=character_name, play=play, word_count=word_count)
+            db.session.add(character)
 
     return Character.query.filter(Character.play_id == play.id).all()
 
@@ -106,7 +148,7 @@ def add_question(play, title, description, img=None):
     question = Question(play_id=play.id, title=title, description=description, img=img)
 
     db.session.add(question)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {question} *********")
     return question
@@ -118,7 +160,7 @@ def add_question_character(question, character):
     question_character = CharacterQuestion(question_id=question.id, character_id=character.id)
 
     db.session.add(question_character)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {question_character} *********")
     return question_character
@@ -130,7 +172,7 @@ def add_question_scene(question, scene):
     question_scene = SceneQuestion(question_id=question.id, scene_id=scene.id)
 
     db.session.add(question_scene)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {question_scene} *********")
     return question_scene
@@ -143,7 +185,7 @@ def add_film(play, moviedb_id, imdb_id, title, release_date, language, overview,
                 language=language, overview=overview, length=length, poster_path=poster_path)
 
     db.session.add(film)
-    db.session.commit()
+    commit_changes()
 
     print(f"Created {film} *********")
     return film
@@ -155,7 +197,7 @@ def add_job(title):
     job = Job(title=title)
 
     db.session.add(job)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {job} *********")
     return job
@@ -167,7 +209,7 @@ def add_person_job(film, job, person):
     personjob = PersonJob(film_id=film.id, job_id=job.id, person_id=person.id)
     
     db.session.add(personjob)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {personjob} *********")
     return personjob
@@ -180,7 +222,7 @@ def add_interpretation(question, play, title, description, film, time_start, tim
         title=title, description=description, time_start=time_start, time_end=time_end, img=img)
 
     db.session.add(interpretation)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {interpretation} *********")
     return interpretation
@@ -192,7 +234,7 @@ def add_character_interpretation(interpretation, character):
     character_interpretation = CharacterInterpretation(interpretation_id=interpretation.id, character_id=character.id)
 
     db.session.add(character_interpretation)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {character_interpretation} *********")
     return character_interpretation
@@ -204,7 +246,7 @@ def add_scene_interpretation(interpretation, scene):
     scene_interpretation = SceneInterpretation(interpretation_id=interpretation.id, scene_id=scene.id)
 
     db.session.add(scene_interpretation)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {scene_interpretation} *********")
     return scene_interpretation
@@ -221,7 +263,7 @@ def add_character_actor(person, character_name, film, img=None):
     character_actor=CharacterActor(person_id=person.id, character_id=character.id, film_id=film.id, img=img)
 
     db.session.add(character_actor)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {character_actor} *********")
     return character_actor
@@ -234,7 +276,7 @@ def add_person(moviedb_id, imdb_id, fname, lname, birthday, gender, photo_path):
                     birthday=birthday, gender=gender, photo_path=photo_path)
 
     db.session.add(person)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {person} *********")
     return person
@@ -245,7 +287,7 @@ def add_play(title, shortname, img=None):
 
     play = Play(title=title, shortname=shortname, img=img)
     db.session.add(play)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {play} *********")
     return play
@@ -256,7 +298,7 @@ def add_quote(play, character, scene, text, img=None):
 
     quote = Quote(play_id=play.id, character_id=character.id, scene_id=scene.id, text=text, img=img)
     db.session.add(quote)
-    db.session.commit()
+    commit_changes()
 
 
 def add_scene(act, scene, play, title, description=None, img=None):
@@ -264,7 +306,7 @@ def add_scene(act, scene, play, title, description=None, img=None):
 
     scene = Scene(act=act, scene=scene, title=title, description=description, play_id=play.id, img=img)
     db.session.add(scene)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {scene} *********")
     return scene
@@ -275,11 +317,10 @@ def add_all_scenes(play):
 
     scenes = parse_folger_scenes(play)
 
-    for scene in scenes.values():
-        db_scene = get_scene(act=scene["act"], scene=scene["scene"], play=play)
-        db.session.add(db_scene)
-    
-    db.session.commit()
+    with batch():
+        for scene in scenes.values():
+            db_scene = get_scene(act=scene["act"], scene=scene["scene"], play=play)
+            db.session.add(db_scene)
 
     return Scene.query.filter(Scene.play_id == play.id).all()
 
@@ -290,7 +331,7 @@ def add_topic(title, description, img=None):
     topic = Topic(title=title, description=description, img=img)
 
     db.session.add(topic)
-    db.session.commit()
+    commit_changes()
 
     print(f"********* Created {topic} *********")
     return topic
@@ -298,30 +339,251 @@ def add_topic(title, description, img=None):
 # ----- END: ADD FUNCTIONS ----- #
 
 
+# ----- BEGIN: BULK IMPORT FUNCTIONS ----- #
+# For writing a whole imported film or play in a handful of set-based queries
+
+PART_POLICIES = ("exact", "close", "create")
+
+def bulk_add(model, rows, index=True):
+    """Given a model and a list of column dictionaries, insert all the rows in one statement, add them to the search
+    index unless index is False, and return the new records in insertion order. Doesn't commit."""
+
+    if not rows:
+        return []
+
+    new_ids = db.session.execute(insert(model).values(rows).returning(model.id)).scalars().all()
+    records = model.query.filter(model.id.in_(new_ids)).order_by(model.id).all()
+    if index:
+        index_records(records)
+    return records
+
+
+def index_records(records, change="insert"):
+    """Given newly inserted (or, with change="update", updated) records, add them to the search index with one index
+    writer per whoosheer. (Flask-Whooshee's own hooks open and commit a writer for every single record.)"""
+
+    config = current_app.extensions["whooshee"]
+    if config["enable_indexing"] is False:
+        return
+
+    for whoosheer in whooshee.whoosheers:
+        changes = []
+        for record in records:
+            method = getattr(whoosheer, f"{change}_{type(record).__name__.lower()}", None)
+            if type(record) in whoosheer.models and method:
+                changes.append((method, record))
+        if changes:
+            index = Whooshee.get_or_create_index(current_app._get_current_object(), whoosheer)
+            with index.writer(timeout=config["writer_timeout"]) as writer:
+                for method, record in changes:
+                    method(writer, record)
+
+
+def upsert_scene_descriptions(play, descriptions):
+    """Given a play and a dictionary of scene descriptions keyed by (act, scene), add any missing scenes and update
+    changed descriptions in a single transaction. Return the play's scenes in order of act/scene."""
+
+    scenes = {(scene.act, scene.scene): scene for scene in Scene.query.filter(Scene.play_id == play.id)}
+    rows = [{"play_id": play.id, "act": act, "scene": scene, "description": description}
+            for (act, scene), description in descriptions.items()
+            if (act, scene) not in scenes or scenes[(act, scene)].description != description]
+
+    if rows and db.engine.dialect.name == "postgresql":
+        # ON CONFLICT also covers scenes another worker added since the read above
+        upsert = postgresql.insert(Scene).values(rows)
+        upsert = upsert.on_conflict_do_update(constraint="scenes_play_act_scene_key",
+                                              set_={"description": upsert.excluded.description},
+                                              where=Scene.description.is_distinct_from(upsert.excluded.description))
+        changed_ids = db.session.execute(upsert.returning(Scene.id)).scalars().all()
+        changed_scenes = Scene.query.filter(Scene.id.in_(changed_ids)).populate_existing().all()
+        index_records([scene for scene in changed_scenes if (scene.act, scene.scene) not in scenes])
+        index_records([scene for scene in changed_scenes if (scene.act, scene.scene) in scenes], change="update")
+    else:
+        for row in rows:
+            scene = scenes.get((row["act"], row["scene"]))
+            if scene:
+                scene.description = row["description"]
+            else:
+                db.session.add(Scene(**row))
+
+    commit_changes()
+
+    print(f"********* Upserted {len(rows)} scene descriptions for {play} *********")
+    return Scene.query.filter(Scene.play_id == play.id).order_by(Scene.act, Scene.scene).all()
+
+
+def match_character(part_name, characters, policy="close"):
+    """Given a credited part name, a dictionary of lowercased character names to Character objects and a matching policy,
+    return the matching Character or None. "exact" only matches the same name, ignoring case; "close" also matches
+    credits such as "Hamlet, Prince of Denmark" or "Ophelia (as Kate Winslet)" and close spellings. "create" matches
+    like "exact"; add_imported_film creates the characters it doesn't match."""
+
+    name = part_name.strip().lower()
+    if name in characters:
+        return characters[name]
+    if policy in ("exact", "create"):
+        return None
+
+    for separator in (",", "(", " - "):
+        short_name = name.split(separator)[0].strip()
+        if short_name in characters:
+            return characters[short_name]
+
+    close_names = difflib.get_close_matches(name, characters.keys(), n=1, cutoff=0.85)
+    if close_names:
+        return characters[close_names[0]]
+
+    return None
+
+
+def add_imported_film(play, details, people, part_policy="close"):
+    """Given a play, parsed MovieDB film details and merged cast/crew dictionaries, write the film, its people, 
+    jobs and parts in one transaction using batched inserts, in the same number of queries however big the cast.
+    Existing people are refreshed with the given details. Parts that don't match a character under the part
+    policy are skipped, or with the "create" policy added to the play as new characters. Return the Film object."""
+
+    film = Film.query.filter(Film.moviedb_id == str(details["film_moviedb_id"])).first()
+    if not film:
+        film, = bulk_add(Film, [{"play_id": play.id, "moviedb_id": str(details["film_moviedb_id"]), "imdb_id": details["film_imdb_id"], 
+                                 "title": details["title"], "release_date": details["release_date"], "language": details["language"], 
+                                 "overview": details["overview"], "length": details["length"], "poster_path": details.get("poster_path")}])
+
+    characters = {character.name.lower(): character for character in Character.query.filter(Character.play_id == play.id)}
+
+    if part_policy == "create":
+        new_names = {}
+        for person in people.values():
+            for part in person.get("parts_played", []):
+                if part and not match_character(part, characters, part_policy):
+                    new_names.setdefault(part.strip().lower(), part.strip())
+        for character in bulk_add(Character, [{"name": name, "play_id": play.id, "gender": 2} for name in new_names.values()]):
+            characters[character.name.lower()] = character
+
+    # Work out every part and job before touching the database again
+    credits = {}
+    job_titles = set()
+    for person in people.values():
+        parts = [match_character(part, characters, part_policy) for part in person.get("parts_played", []) if part]
+        parts = [character for character in parts if character]
+        job_list = [job for job in person.get("jobs", []) if job]
+        if parts:
+            job_list.append("Actor")
+        if parts or job_list:
+            credits[str(person["person_moviedb_id"])] = (person, parts, job_list)
+            job_titles.update(job_list)
+
+    jobs = {job.title: job for job in Job.query.filter(Job.title.in_(job_titles))}
+    for job in bulk_add(Job, [{"title": title} for title in job_titles - jobs.keys()]):
+        jobs[job.title] = job
+
+    db_people = {person.moviedb_id: person for person in Person.query.filter(Person.moviedb_id.in_(credits.keys()))}
+    now = datetime.now()
+    for person in db_people.values():
+        # Details were just verified against MovieDB, so refresh the stored row and its last_updated time, even when
+        # nothing changed, or get_stored_people() keeps treating the person as stale
+        for column, value in person_details(credits[person.moviedb_id][0]).items():
+            if getattr(person, column) != value:
+                setattr(person, column, value)
+        person.last_updated = now
+
+    new_people = [{"moviedb_id": moviedb_id, **person_details(person)} for moviedb_id, (person, parts, job_list) in credits.items()
+                  if moviedb_id not in db_people]
+    for person in bulk_add(Person, new_people):
+        db_people[person.moviedb_id] = person
+
+    existing_person_jobs = set(db.session.query(PersonJob.person_id, PersonJob.job_id).filter(PersonJob.film_id == film.id))
+    existing_character_actors = set(db.session.query(CharacterActor.person_id, CharacterActor.character_id).filter(CharacterActor.film_id == film.id))
+
+    person_job_rows = []
+    character_actor_rows = []
+    for moviedb_id, (person, parts, job_list) in credits.items():
+        person_id = db_people[moviedb_id].id
+        for title in dict.fromkeys(job_list):
+            if (person_id, jobs[title].id) not in existing_person_jobs:
+                person_job_rows.append({"person_id": person_id, "film_id": film.id, "job_id": jobs[title].id})
+        for character in dict.fromkeys(parts):
+            if (person_id, character.id) not in existing_character_actors:
+                character_actor_rows.append({"person_id": person_id, "character_id": character.id, "film_id": film.id})
+
+    if person_job_rows:
+        db.session.execute(PersonJob.__table__.insert(), person_job_rows)
+    if character_actor_rows:
+        db.session.execute(CharacterActor.__table__.insert(), character_actor_rows)
+    commit_changes()
+
+    print(f"********* Imported {film}: {len(db_people)} people, {len(person_job_rows)} jobs, {len(character_actor_rows)} parts *********")
+    return film
+
+
+def person_details(person):
+    """Given an imported person dictionary, return the Person column values it sets, apart from moviedb_id, 
+    with dates and genders converted to the types stored in the database."""
+
+    birthday = person["birthday"] or None
+    if isinstance(birthday, datetime):
+        birthday = birthday.date()
+    elif isinstance(birthday, str):
+        birthday = date.fromisoformat(birthday)
+    gender = str(person["gender"]) if person["gender"] is not None else None
+
+    return {"imdb_id": person["person_imdb_id"], "fname": person["fname"], "lname": person["lname"],
+            "birthday": birthday, "gender": gender, "photo_path": person["photo_path"]}
+
+# ----- END: BULK IMPORT FUNCTIONS ----- #
+
+
 # ----- BEGIN: GET FUNCTIONS ----- #
 # For retrieving existing database records or creating new ones
 
+def get_or_create(model, defaults=None, **lookup):
+    """Given a model, the column values identifying a record and optional column values for a new record, return
+    (record, created). Runs one SELECT and, on a miss, one INSERT ... ON CONFLICT DO NOTHING RETURNING; if another
+    worker inserts the same record first, the conflict is ignored and their record is returned instead.
+    Relies on a unique constraint over the lookup columns. Records already looked up in the current request are
+    returned without any queries."""
+
+    record = request_memo.get(model, lookup)
+    if record is not None:
+        return record, False
+
+    record = model.query.filter_by(**lookup).first()
+    if record:
+        request_memo.set(model, lookup, record)
+        return record, False
+
+    values = {**lookup, **(defaults or {})}
+    if db.engine.dialect.name == "postgresql":
+        new_record = postgresql.insert(model).values(values).on_conflict_do_nothing().returning(*model.__table__.columns)
+        record = db.session.execute(select(model).from_statement(new_record)).scalars().first()
+        if record is None: # lost the race; the other worker's row is visible now that its insert has committed
+            record = model.query.filter_by(**lookup).one()
+            request_memo.set(model, lookup, record)
+            return record, False
+        index_records([record])
+    else:
+        record = model(**values)
+        db.session.add(record)
+    commit_changes()
+    request_memo.set(model, lookup, record)
+
+    print(f"********* Created {record} *********")
+    return record, True
+
+
 def get_character(name, play, gender=2, word_count=None, img=None):
     """Given a character name, gender, and play, return the Character object."""
 
-    existing_character = db.session.query(exists().where((Character.name == name) & (Character.play_id == play.id))).scalar()
-    
-    if existing_character:
-        character = Character.query.filter((Character.name == name) & (Character.play_id == play.id)).first()
-    else:
-        character = add_character(name=name, play=play, gender=gender, word_count=word_count, img=img)
-    
+    character, created = get_or_create(Character, defaults={"gender": gender, "word_count": word_count, "img": img},
+                                       name=name, play_id=play.id)
     return character
 
 
 def get_all_characters_by_play(play):
     """Given a play, return any existing related Character objects in the database."""
 
-    existing_characters = db.session.query(exists().where(Character.play_id == play.id)).scalar()
+    characters = Character.query.filter(Character.play_id == play.id).order_by(Character.id).all()
 
-    if existing_characters:
-        characters = Character.query.filter(Character.play_id == play.id).order_by(Character.id).all()
-    else:
+    if not characters:
         add_all_characters(play)
         characters = Character.query.filter(Character.play_id == play.id).order_by(Character.id).all()
     return characters
@@ -330,109 +592,60 @@ def get_all_characters_by_play(play):
 def get_question(play, title):
     """Given a play and question title, return the Question database record."""
 
-    existing_question = db.session.query(exists().where((Question.play_id == play.id) & (Question.title == title))).scalar()
-
-    if existing_question:
-        return Question.query.filter((Question.play_id == play.id) & (Question.title == title)).first()
-    else:
-        return None
+    return Question.query.filter((Question.play_id == play.id) & (Question.title == title)).first()
 
 
 def get_all_questions_by_play(play):
     """Given a play, return any existing related Question objects in the database."""
 
-    existing_questions = db.session.query(exists().where(Question.play_id == play.id)).scalar()
-
-    if existing_questions:
-        return Question.query.filter(Question.play_id == play.id).all()
-    else:
-        return None
+    return Question.query.filter(Question.play_id == play.id).all() or None
 
 
 def get_question_character(question, character):
     """Given a question and character, return or create a CharacterQuestion object."""
 
-    existing_question_character = db.session.query(exists().where((CharacterQuestion.question_id == question.id) & (CharacterQuestion.character_id == character.id))).scalar()
-
-    if existing_question_character:
-        question_character = CharacterQuestion.query.filter((CharacterQuestion.question_id == question.id) & (CharacterQuestion.character_id == character.id)).first()
-    else:
-        question_character = add_question_character(question, character)
-
+    question_character, created = get_or_create(CharacterQuestion, question_id=question.id, character_id=character.id)
     return question_character
 
 
 def get_question_scene(question, scene):
     """Given a question and scene, return or create a SceneQuestion object."""
 
-    existing_question_scene = db.session.query(exists().where((SceneQuestion.question_id == question.id) & (SceneQuestion.scene_id == scene.id))).scalar()
-
-    if existing_question_scene:
-        question_scene = SceneQuestion.query.filter((SceneQuestion.question_id == question.id) & (SceneQuestion.scene_id == scene.id)).first()
-    else:
-        question_scene = add_question_scene(question, scene)
-
+    question_scene, created = get_or_create(SceneQuestion, question_id=question.id, scene_id=scene.id)
     return question_scene
 
 
 def get_interpretation(question, film):
     """Given a question and film, return the related Interpretation object."""
 
-    existing_interpretation = db.query.session(exists().where((Interpretation.question_id == question.id) & (Interpretation.film_id == film.id))).scalar()
-
-    if existing_interpretation:
-        return Interpretation.query.filter((Interpretation.question_id == question.id) & (Interpretation.film_id == film.id)).first()
-    else:
-        return None
+    return Interpretation.query.filter((Interpretation.question_id == question.id) & (Interpretation.film_id == film.id)).first()
 
 
 def get_all_interpretations_by_play(play):
     """Given a play, return any existing related Interpretation objects in the database."""
 
-    existing_interpretations = db.session.query(exists().where(Interpretation.play_id == play.id)).scalar()
-
-    if existing_interpretations:
-        return Interpretation.query.filter(Interpretation.play_id == play.id).all()
-    else:
-        return None
+    return Interpretation.query.filter(Interpretation.play_id == play.id).all() or None
 
 
 def get_character_interpretation(interpretation, character):
     """Given an interpretation and character, return or create an CharacterInterpretation object."""
 
-    existing_character_interpretation = db.session.query(exists().where((CharacterInterpretation.interpretation_id == interpretation.id) & (CharacterInterpretation.character_id == character.id))).scalar()
-
-    if existing_character_interpretation:
-        character_interpretation = CharacterInterpretation.query.filter((CharacterInterpretation.interpretation_id == interpretation.id) & (CharacterInterpretation.character_id == character.id)).first()
-    else:
-        character_interpretation = add_character_interpretation(interpretation, character)
-
+    character_interpretation, created = get_or_create(CharacterInterpretation, interpretation_id=interpretation.id,
+                                                      character_id=character.id)
     return character_interpretation
 
 
 def get_scene_interpretation(interpretation, scene):
     """Given an interpretation and scene, return or create an SceneInterpretation object."""
 
-    existing_scene_interpretation = db.session.query(exists().where((SceneInterpretation.interpretation_id == interpretation.id) & (SceneInterpretation.scene_id == scene.id))).scalar()
-
-    if existing_scene_interpretation:
-        scene_interpretation = SceneInterpretation.query.filter((SceneInterpretation.interpretation_id == interpretation.id) & (Interpretation.scene_id == scene.id)).first()
-    else:
-        scene_interpretation = add_scene_interpretation(interpretation, scene)
-
+    scene_interpretation, created = get_or_create(SceneInterpretation, interpretation_id=interpretation.id, scene_id=scene.id)
     return scene_interpretation
 
 
 def get_job_by_title(title):
     """Given a job title, return the Job object."""
 
-    existing_job = db.session.query(exists().where(Job.title == title)).scalar()
-
-    if existing_job:
-        job = Job.query.filter(Job.title == title).first()
-    else:
-        job = add_job(title)
-    
+    job, created = get_or_create(Job, title=title)
     return job
 
 
@@ -441,37 +654,16 @@ def get_person_job(person, film, job_title):
 
     job = get_job_by_title(job_title)
 
-    existing_person_job = db.session.query(exists().where((PersonJob.person_id == person.id) & (PersonJob.film_id == film.id) & (PersonJob.job_id == job.id))).scalar()
-    
-    if existing_person_job:
-        person_job = PersonJob.query.filter((PersonJob.person_id == person.id) & (PersonJob.film_id == film.id) & (PersonJob.job_id == job.id)).first()
-    else:
-        person_job = add_person_job(film, job, person)
-    
+    person_job, created = get_or_create(PersonJob, person_id=person.id, film_id=film.id, job_id=job.id)
     return person_job
 
 
-def get_film(play, moviedb_id, imdb_id, title, release_date, language, overview, length, poster_path):
-
-    existing_film = db.session.query(exists().where(Film.moviedb_id == moviedb_id)).scalar()
-    
-    if existing_film:
-        film = Film.query.filter(Film.moviedb_id == moviedb_id).first()
-    else:
-        film = add_film(play=play, moviedb_id=moviedb_id, imdb_id=imdb_id, title=title, release_date=release_date, 
-                        language=language, length=length, overview=overview, poster_path=poster_path)
-    
-    return film
-
-
 def get_film_by_moviedb_id(moviedb_id, play):
     """Given a film's MovieDB ID, return the Film object."""
 
-    existing_film = db.session.query(exists().where(Film.moviedb_id == moviedb_id)).scalar()
-    
-    if existing_film:
-        film = Film.query.filter(Film.moviedb_id == moviedb_id).first()
-    else:
+    film = Film.query.filter(Film.moviedb_id == moviedb_id).first()
+
+    if not film:
         film = parse_moviedb_film_details(moviedb_id, play)
     
     return film
@@ -480,42 +672,67 @@ def get_film_by_moviedb_id(moviedb_id, play):
 def get_films_by_play(play):
     """Given a play, return the related Film objects."""
 
-    existing_films = db.session.query(exists().where(Film.play_id == play.id)).scalar()
-    
-    if existing_films:
-        return Film.query.filter(Film.play_id == play.id).all()
-    else:
-        return None
+    return Film.query.filter(Film.play_id == play.id).all() or None
 
 
-def get_person(moviedb_id, imdb_id, fname, lname, birthday, gender, photo_path):
-    """Given a person's information, create (or return) a Person object."""
+def get_film_by_id(id):
+    """Given a film's id, return the Film object, with its interpretations and their questions loaded."""
 
-    existing_person = db.session.query(exists().where((Person.moviedb_id == moviedb_id) & (Person.fname == fname) & (Person.lname == lname))).scalar()
+    return Film.query.options(selectinload(Film.interpretations).joinedload(Interpretation.question)).get(id)
 
-    if existing_person:
-        person = Person.query.filter((Person.moviedb_id == moviedb_id) & (Person.fname == fname) & (Person.lname == lname)).first()
-    else:
-        person = add_person(moviedb_id=moviedb_id, imdb_id=imdb_id, fname=fname, lname=lname,
-                    birthday=birthday, gender=gender, photo_path=photo_path)
-    
-    return person
 
+def get_film_cast(film):
+    """Given a film, return its CharacterActor objects ordered by character, with their people and characters loaded."""
 
-def get_character_actor(person, character_name, film, img=None):
-    """Given a person's information, create (or return) a Person object."""
+    return (CharacterActor.query.join(CharacterActor.person).join(CharacterActor.character)
+            .options(contains_eager(CharacterActor.person), contains_eager(CharacterActor.character))
+            .filter(CharacterActor.film_id == film.id).order_by(Character.id).all())
 
-    play = get_play_by_film(film)
-    character = get_character(name=character_name, play=play)
 
-    existing_character_actor = db.session.query(exists().where((CharacterActor.person_id == person.id) & (CharacterActor.character_id == character.id) & (CharacterActor.film_id == film.id))).scalar()
+def get_film_crew(film):
+    """Given a film, return its PersonJob objects for every job but Actor ordered by last name, with their people
+    and jobs loaded."""
 
-    if existing_character_actor:
-        character_actor = CharacterActor.query.filter((CharacterActor.person_id == person.id) & (CharacterActor.character_id == character.id) & (CharacterActor.film_id == film.id)).first()
-    else:
-        character_actor = add_character_actor(person=person, character_name=character_name, film=film, img=img)
-    
-    return character_actor
+    return (PersonJob.query.join(PersonJob.people).join(PersonJob.job)
+            .options(contains_eager(PersonJob.people), contains_eager(PersonJob.job))
+            .filter((PersonJob.film_id == film.id) & (Job.title != "Actor")).order_by(Person.lname).all())
+
+
+def get_film_summaries(films):
+    """Given a list of films, return a dictionary of each film's id to its lead actor (who plays the film's character
+    with the highest word count, or None) and directors, found for all the films at once."""
+
+    film_ids = [film.id for film in films]
+    summaries = {film_id: {"lead": None, "directors": []} for film_id in film_ids}
+    if not film_ids:
+        return summaries
+
+    for film in films: # the session only holds plays weakly, so hand each film its play from the catalog
+        set_committed_value(film, "play", get_play_by_film(film))
+
+    # Rank each film's cast by their characters' word counts with a window function (portable, unlike DISTINCT ON)
+    ranked_cast = (db.session.query(CharacterActor.film_id, CharacterActor.person_id,
+                                    func.row_number().over(partition_by=CharacterActor.film_id,
+                                                           order_by=(Character.word_count.desc().nullslast(), Character.id))
+                                    .label("cast_rank"))
+                   .join(CharacterActor.character).filter(CharacterActor.film_id.in_(film_ids)).subquery())
+    leads = (db.session.query(ranked_cast.c.film_id, Person).join(Person, Person.id == ranked_cast.c.person_id)
+             .filter(ranked_cast.c.cast_rank == 1))
+    for film_id, person in leads:
+        summaries[film_id]["lead"] = person
+
+    directors = (db.session.query(PersonJob.film_id, Person).join(PersonJob.people).join(PersonJob.job)
+                 .filter(PersonJob.film_id.in_(film_ids) & (Job.title == "Director")).order_by(Person.lname))
+    for film_id, person in directors:
+        summaries[film_id]["directors"].append(person)
+
+    return summaries
+
+
+def get_play_by_id(id):
+    """Given a play's id, return the play from the play catalog."""
+
+    return play_catalog.get(id=id)
 
 
 def get_play_by_shortname(shortname):
@@ -523,68 +740,58 @@ def get_play_by_shortname(shortname):
 
     from app.main.forms import play_titles
 
-    existing_play = db.session.query(exists().where(Play.shortname == shortname)).scalar()
-
-    if existing_play:
-        play = Play.query.filter(Play.shortname == shortname).one()
-        return play
-    elif play_titles.get(shortname):
-        play = add_play(play_titles[shortname], shortname)
-        return play
-    else:
-        return None
+    play = play_catalog.get(shortname=shortname)
+    if play is None and play_titles.get(shortname):
+        play, created = get_or_create(Play, defaults={"title": play_titles[shortname]}, shortname=shortname)
+        play_catalog.invalidate() # added since the catalog was loaded, here or by another process
+    return play
 
 
 def get_play_by_title(title):
     """Given a play's complete title, return the play."""
 
-    existing_play = db.session.query(exists().where(Play.title == title)).scalar()
+    from app.main.forms import play_titles
 
-    if existing_play:
-        play = Play.query.filter(Play.title == title).first()
-    else:
+    play = play_catalog.get(title=title)
+    if play is None:
         for shortname, play_title in play_titles.items():
             if title == play_title:
-                play = add_play(shortname, play_title)
-    
+                return get_play_by_shortname(shortname)
+
     return play
 
 
 def get_play_by_film(film):
     """Given a film, return the associated play."""
 
-    play_id = film.play_id
-    play = Play.query.filter(Play.id == play_id).first()
-    return play
+    return play_catalog.get(id=film.play_id)
+
+
+def get_all_plays():
+    """Return all plays, ordered by title."""
+
+    return play_catalog.all()
 
 
 def get_scene(act, scene, play, title=None, description=None, img=None):
     """Given an act, scene, and play, return the appropriate Scene object."""
 
-    existing_scene = db.session.query(exists().where((Scene.act == act) & (Scene.scene == scene) & (Scene.play_id == play.id))).scalar()
+    db_scene, created = get_or_create(Scene, defaults={"title": title, "description": description, "img": img},
+                                      act=act, scene=scene, play_id=play.id)
 
-    if existing_scene:
-        scene = Scene.query.filter((Scene.act == act) & (Scene.scene == scene) & (Scene.play_id == play.id)).first()
-        if title != scene.title or description != scene.description or img != scene.img:
-            updated_scene = update_scene(scene, title, description, img)
-            return updated_scene
-        else:
-            return scene
-    else:
-        new_scene = add_scene(act=act, scene=scene, play=play, title=title, description=description, img=img)
-        return new_scene
+    if not created and (title != db_scene.title or description != db_scene.description or img != db_scene.img):
+        return update_scene(db_scene, title, description, img)
+    return db_scene
 
 
 def get_all_scenes_by_play(play):
     """Given a play, return any existing related Scene objects in the database in order of act/scene."""
 
-    existing_scenes = db.session.query(exists().where(Scene.play_id == play.id)).scalar()
+    scenes = Scene.query.filter(Scene.play_id == play.id).order_by(Scene.act, Scene.scene).all()
     print(f"****************** IN GET_ALL_SCENES, play {play.title} *******************")
-    print(f"****************** EXISTING SCENES: {existing_scenes} *******************")
+    print(f"****************** EXISTING SCENES: {bool(scenes)} *******************")
 
-    if existing_scenes:
-        scenes = Scene.query.filter(Scene.play_id == play.id).order_by(Scene.act, Scene.scene).all()
-    else:
+    if not scenes:
         add_all_scenes(play)
         scenes = Scene.query.filter(Scene.play_id == play.id).order_by(Scene.act, Scene.scene).all()
 
@@ -609,7 +816,7 @@ def update_character(character, name=None, gender=None, img=None):
         db_character.img = img
     
     db.session.merge(db_character)
-    db.session.commit()
+    commit_changes()
     return db_character
 
 
@@ -626,7 +833,7 @@ def update_question(question, title=None, description=None, img=None):
         db_question.img = img
     
     db.session.merge(db_question)
-    db.session.commit()
+    commit_changes()
     return db_question
 
 
@@ -651,7 +858,7 @@ def update_interpretation(interpretation, play=None, film=None, title=None, desc
         db_interpretation.img = img
     
     db.session.merge(db_interpretation)
-    db.session.commit()
+    commit_changes()
     return db_interpretation
 
 
@@ -668,7 +875,7 @@ def update_scene(scene, title=None, description=None, img=None):
         db_scene.img = img
     
     db.session.merge(db_scene)
-    db.session.commit()
+    commit_changes()
     return db_scene
 
 # ----- END: UPDATE FUNCTIONS ----- #
@@ -681,11 +888,10 @@ def random_scene(play=None):
     """Returns a random scene. Can  be limited by play"""
 
     if play:
-        scenes = Scene.query.filter(Scene.play_id == play.id).all()
-    else:
-        scenes = Scene.query.all()
+        scene_ids = [id for id, in db.session.query(Scene.id).filter(Scene.play_id == play.id)]
+        return Scene.query.get(random.choice(scene_ids)) if scene_ids else None
 
-    return random.question(scenes)
+    return random_pool.choice(Scene, prefer_image=False)
 
 # ----- BEGIN: RANDOM FUNCTIONS ----- #
 
@@ -704,8 +910,12 @@ def calculate_age_during_film(person, film):
 
 
 def seed_play(play):
-    scenes = get_all_scenes_by_play(play)
-    characters = get_all_characters_by_play(play)
+    """Given a play, add its Folger characters, scenes and scene descriptions in one transaction."""
+
+    from app.main.seed import seed_plays
+    report = seed_plays([play.shortname])
+    if "error" in report[0]:
+        raise RuntimeError(f"Couldn't seed {play} from Folger: {report[0]['error']}")
 
 
 def delete_object(object):
@@ -714,30 +924,9 @@ def delete_object(object):
 
 
 def get_random_image(type):
+    """Given a model, return a random record of that type, preferring records with an image, or None if there are none.
+    Costs one primary key lookup; the ids to choose from are kept in memory by random_pool."""
 
-    options = []
-    if type is Film:
-        type_has_img = db.session.query(exists().where((type.poster_path != None) & (type.poster_path != "None"))).scalar()
-        if type_has_img: 
-            options = type.query.filter((type.poster_path != None) & (type.poster_path != "None")).all()
-        elif Film.query.all():
-            options = random.choice(Film.query.all())
-    elif type is Person:
-        type_has_img = db.session.query(exists().where((type.photo_path != None) & (type.photo_path != "None"))).scalar()
-        if type_has_img: 
-            options = type.query.filter((type.photo_path != None) & (type.photo_path != "None")).all()
-        elif Person.query.all():
-            options = random.choice(Person.query.all())
-    else:
-        type_has_img = db.session.query(exists().where((type.img != None) & (type.img != "None"))).scalar()
-        if type_has_img:
-            options = type.query.filter((type.img != None) & (type.img != "None")).all()
-        elif type.query.all():
-            options = type.query.all()
-
-    if options:
-        return random.choice(options)
-    else:
-        return None
+    return random_pool.choice(type)
 
 # ----- END: MISC FUNCTIONS ----- #
@@ -0,0 +1,70 @@
+"""Micro-benchmark comparing the Folger page extractors with the original BeautifulSoup implementation."""
+
+from app.main.folger_parser import (extract_folger_characters, extract_folger_scenes, extract_folger_synopses,
+                                    folger_page_url, get_folger_page)
+from bs4 import BeautifulSoup
+import re
+import time
+
+FOLGER_PAGES = {"charText": "characters", "scenes": "scenes", "synopsis": "synopses"}
+
+
+def soup_extract_folger_characters(page):
+  """Reference implementation of extract_folger_characters: regexes over a re-serialized BeautifulSoup tree."""
+
+  soup = BeautifulSoup(page, "html.parser")
+  return re.findall(r'(?P<wordcount>(?<=60px;">)\d+).*(?P<character>(?<=.html">)\w+)', str(soup))
+
+
+def soup_extract_folger_scenes(page):
+  """Reference implementation of extract_folger_scenes."""
+
+  scenes = []
+  soup = BeautifulSoup(page, "html.parser")
+  for scene in soup.find_all("p"):
+    scene_regx = re.search(r'(?P<act>(?<=Act )\d+).*(?P<scene>(?<=, scene )\d+)', str(scene))
+    if scene_regx:
+      scenes.append(scene_regx.groupdict())
+  return scenes
+
+
+def soup_extract_folger_synopses(page):
+  """Reference implementation of extract_folger_synopses."""
+
+  soup = BeautifulSoup(page, "html.parser")
+  return re.findall(r'(?P<act>(?<=<p>Act )\d+).*(?P<scene>(?<=, Scene )\d+): (?P<synopsis>.*)(?=</p>)', str(soup))
+
+
+EXTRACTORS = {
+  "characters": (soup_extract_folger_characters, extract_folger_characters),
+  "scenes": (soup_extract_folger_scenes, extract_folger_scenes),
+  "synopses": (soup_extract_folger_synopses, extract_folger_synopses),
+}
+
+
+def time_extractor(extractor, page, repeat):
+  """Given an extractor, a page and a repeat count, return the extractor's output and its best time in seconds."""
+
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    output = extractor(page)
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return output, best
+
+
+def benchmark_folger_parsers(shortnames, repeat=5):
+  """Given play shortnames, time both extractors on each play's Folger pages and check their outputs match.
+  Return a list of report rows with shortname, page, soup_time, fast_time and match."""
+
+  report = []
+  for shortname in shortnames:
+    for page_name, kind in FOLGER_PAGES.items():
+      page = get_folger_page(folger_page_url(shortname, page_name))
+      soup_extractor, fast_extractor = EXTRACTORS[kind]
+      soup_output, soup_time = time_extractor(soup_extractor, page, repeat)
+      fast_output, fast_time = time_extractor(fast_extractor, page, repeat)
+      report.append({"shortname": shortname, "page": kind, "soup_time": soup_time, "fast_time": fast_time,
+                     "items": len(fast_output), "match": soup_output == fast_output})
+  return report
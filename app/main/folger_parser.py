@@ -1,23 +1,163 @@
 """Classes and functions used for parsing Folger Shakespeare API data."""
 
-from bs4 import BeautifulSoup
+from app import http_client, response_cache
+from bs4 import UnicodeDammit
+from html.parser import HTMLParser
 
+import html
 import re
 import requests
 
-def parse_folger_characters(play):
-  """Given a play, return a numbered dictionary of character names and wordcounts from the Folger API, ordered by wordcount."""
+# The Folger pages are small, regular and static, so the fields the parsers need are collected in a single pass
+# over the page's tags by FolgerPageParser, instead of building (and re-serializing) a BeautifulSoup tree first.
+CHARACTER_NAME_SPLIT_RE = re.compile(r'(?<![A-Z\W])(?=[A-Z])') # Split name after each lowercase letter before an uppercase character
+CHARACTER_LINK_RE = re.compile(r'.html$') # The character table links each name to the character's page
+WORDCOUNT_RE = re.compile(r'\d+')
+NAME_RE = re.compile(r'\w+')
+ACT_SCENE_RE = re.compile(r'(?P<act>(?<=Act )\d+).*(?P<scene>(?<=, scene )\d+)')
+SYNOPSIS_RE = re.compile(r'Act (?P<act>\d+).*, Scene (?P<scene>\d+): (?P<synopsis>.*)$') # $ also matches before the newline ending an unclosed <p>
+
+def get_folger_page(url):
+  """Given a Folger Digital Texts URL, return the page's HTML, from the local page cache where possible.
+  Stale pages are revalidated with If-None-Match/If-Modified-Since, so an unchanged page is never downloaded twice."""
+
+  cached_page = response_cache.get(url, "folger")
+  if cached_page is not None:
+    return cached_page
+
+  stale = response_cache.get_stale(url)
+  headers = {}
+  if stale:
+    body, etag, last_modified = stale
+    if etag:
+      headers["If-None-Match"] = etag
+    if last_modified:
+      headers["If-Modified-Since"] = last_modified
+
+  try:
+    response = http_client.get(url, headers=headers)
+  except requests.RequestException: # includes CircuitOpenError
+    if stale: # Folger is unreachable; an old copy of a static page is better than nothing
+      return stale[0]
+    raise
+  if response.status_code == 304 and stale:
+    response_cache.revalidate(url)
+    return stale[0]
+  if not response.ok and stale: # Folger is down; an old copy of a static page is better than nothing
+    return stale[0]
+  response.raise_for_status()
+
+  # Decode the way BeautifulSoup would (honoring <meta charset>), not with requests' ISO-8859-1 default for text/html
+  page = UnicodeDammit(response.content, is_html=True).unicode_markup
+  response_cache.set(url, page, etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"))
+  return page
+
+
+class FolgerPageParser(HTMLParser):
+  """Collects what the Folger pages are scraped for in one pass over their tags: the (wordcount, name) pairs of a
+  character page's table, and the text of every <p> in document order, as (has attributes, text) pairs.
+  Paragraph text is kept HTML-escaped, with <br/> for line breaks, the way the scene synopses have always been stored."""
+
+  def __init__(self):
+    super().__init__(convert_charrefs=True)
+    self.characters = []
+    self.paragraphs = []
+    self.paragraph = None # a <p> left unclosed ends where the next one starts, as browsers read it
+    self.field = None # "wordcount" inside a wordcount cell, "name" inside a character link
+    self.field_text = []
+    self.wordcount = None
+
+  def handle_starttag(self, tag, attrs):
+    attributes = dict(attrs)
+    if tag == "p":
+      self.paragraph = [bool(attrs), []]
+      self.paragraphs.append(self.paragraph)
+    elif tag == "br" and self.paragraph:
+      self.paragraph[1].append("<br/>")
+    elif tag == "td" and (attributes.get("style") or "").endswith("60px;"):
+      self.field, self.field_text = "wordcount", []
+    elif tag == "a" and CHARACTER_LINK_RE.search(attributes.get("href") or ""):
+      self.field, self.field_text = "name", []
+
+  def handle_endtag(self, tag):
+    if tag == "p":
+      self.paragraph = None
+    elif (tag, self.field) in (("td", "wordcount"), ("a", "name")):
+      self.end_field()
+
+  def handle_data(self, data):
+    if self.paragraph:
+      self.paragraph[1].append(html.escape(data, quote=False))
+    if self.field:
+      self.field_text.append(data)
+
+  def end_field(self):
+    text = "".join(self.field_text)
+    if self.field == "wordcount":
+      wordcount = WORDCOUNT_RE.match(text)
+      self.wordcount = wordcount.group() if wordcount else None
+    else:
+      name = NAME_RE.match(text)
+      if name and self.wordcount:
+        self.characters.append((self.wordcount, name.group()))
+        self.wordcount = None
+    self.field = None
+
+
+def parse_folger_page(page):
+  """Given the HTML of a Folger page, return a FolgerPageParser that has read it."""
+
+  parser = FolgerPageParser()
+  parser.feed(page)
+  parser.close()
+  return parser
+
+
+def extract_folger_characters(page):
+  """Given the HTML of a Folger character wordcount page, return a list of (wordcount, name) tuples as they appear."""
+
+  return parse_folger_page(page).characters
+
+
+def extract_folger_scenes(page):
+  """Given the HTML of a Folger scene list page, return a list of {"act", "scene"} dictionaries in order."""
+
+  scenes = []
+  for has_attributes, text in parse_folger_page(page).paragraphs:
+    scene_regx = ACT_SCENE_RE.search("".join(text))
+    if scene_regx:
+      scenes.append(scene_regx.groupdict())
+  return scenes
+
+
+def extract_folger_synopses(page):
+  """Given the HTML of a Folger synopsis page, return a list of (act, scene, synopsis) tuples in order."""
+
+  synopses = []
+  for has_attributes, text in parse_folger_page(page).paragraphs:
+    synopsis_regx = None if has_attributes else SYNOPSIS_RE.match("".join(text))
+    if synopsis_regx:
+      synopses.append(synopsis_regx.groups())
+  return synopses
+
+
+def folger_page_url(shortname, page_name):
+  """Given a play shortname and Folger page name ("charText", "scenes" or "synopsis"), return the page URL."""
+
+  return f"https://folgerdigitaltexts.org/{shortname}/{page_name}/"
+
+
+def parse_folger_characters(play, page=None):
+  """Given a play, return a numbered dictionary of character names and wordcounts from the Folger API, ordered by wordcount.
+  Uses the given character page HTML instead of fetching it, if provided."""
 
   characters = {}
-  shortname = play.shortname
-  parts_page_url = f"https://folgerdigitaltexts.org/{shortname}/charText/"
-  page = requests.get(parts_page_url)
-  soup = BeautifulSoup(page.content, "html.parser")
+  if page is None:
+    page = get_folger_page(folger_page_url(play.shortname, "charText"))
 
   count = 0
-  wordcount_names = re.findall('(?P<wordcount>(?<=60px;">)\d+).*(?P<character>(?<=.html">)\w+)', str(soup))
-  for wordcount, name in wordcount_names:
-    split_name = re.sub(r'(?<![A-Z\W])(?=[A-Z])', ' ', name) # Split name after each lowercase letter before an uppercase character
+  for wordcount, name in extract_folger_characters(page):
+    split_name = CHARACTER_NAME_SPLIT_RE.sub(' ', name)
     name = "".join(split_name)
     name = name.lstrip()
     if not name.isupper(): # Discard all-CAPS names, which refer to plural speakers like ATTENDANTS
@@ -28,43 +168,31 @@ def parse_folger_characters(play):
   return characters
 
 
-def parse_folger_scenes(play):
-  """Given a play, return the Folger API list of scenes as a numbered dictionary."""
-
-  scenes = {}
+def parse_folger_scenes(play, page=None):
+  """Given a play, return the Folger API list of scenes as a numbered dictionary.
+  Uses the given scene list page HTML instead of fetching it, if provided."""
 
-  shortname = play.shortname
-  scenes_page_url = f"https://folgerdigitaltexts.org/{shortname}/scenes/"
-  page = requests.get(scenes_page_url)
-  soup = BeautifulSoup(page.content, "html.parser")
-  scene_list = soup.find_all("p")
+  if page is None:
+    page = get_folger_page(folger_page_url(play.shortname, "scenes"))
 
-  scene_count = 0
-  for scene in scene_list:
-    scene_regx = re.search(r'(?P<act>(?<=Act )\d+).*(?P<scene>(?<=, scene )\d+)', str(scene))
-    if scene_regx:
-      scenes[scene_count] = scene_regx.groupdict()
-      scene_count += 1
+  scenes = dict(enumerate(extract_folger_scenes(page)))
 
   print(f"********SCENESDICT: {scenes}")
 
   return scenes
 
 
+def parse_folger_synopses(page):
+  """Given the HTML of a Folger synopsis page, return a dictionary of scene synopses keyed by (act, scene) integers."""
+
+  return {(int(act), int(scene)): synopsis.replace("¶", "") for act, scene, synopsis in extract_folger_synopses(page)}
+
+
 def parse_folger_scene_descriptions(play):
-  """Retrieve the Folger API scene descriptions for a play and update any existing Scene objects without a description."""
-  from app.main.crud import get_scene, update_scene, get_all_scenes_by_play
-
-  shortname = play.shortname
-  synopses_page_url = f"https://folgerdigitaltexts.org/{shortname}/synopsis/"
-  page = requests.get(synopses_page_url)
-  soup = BeautifulSoup(page.content, "html.parser")
-  
-  act_scene_synopses = re.findall('(?P<act>(?<=<p>Act )\d+).*(?P<scene>(?<=, Scene )\d+): (?P<synopsis>.*)(?=</p>)', str(soup))
-
-  for act, scene, synopsis in act_scene_synopses:
-    synopsis = synopsis.replace("¶", "")
-    db_scene = get_scene(act=act, scene=scene, play=play, description=synopsis)
-    db_scene = update_scene(scene=db_scene, description=synopsis)
-
-  return get_all_scenes_by_play(play)
\ No newline at end of file
+  """Retrieve the Folger API scene descriptions for a play, add any missing scenes and update changed descriptions
+  in one transaction, and return the play's scenes."""
+  from app.main.crud import upsert_scene_descriptions
+
+  page = get_folger_page(folger_page_url(play.shortname, "synopsis"))
+
+  return upsert_scene_descriptions(play, parse_folger_synopses(page))
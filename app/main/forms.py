@@ -126,6 +126,12 @@ class EditProfileAdminForm(ModelForm):
             raise ValidationError("Username already in use.")
 
 
+class SeedPlaysForm(FlaskForm):
+    """Seed every play's characters and scenes from the Folger Digital Texts."""
+
+    submit = SubmitField("Seed All Plays (via Folger)")
+
+
 class ChoosePlayForm(FlaskForm):
     """Select Shakespeare play."""
 
@@ -1,11 +1,43 @@
 """Classes and functions used for parsing MovieDB API data."""
 
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from app import http_client, response_cache
+from flask import current_app
+import json
 import os
 import re
-import requests
 
 MOVIEDB_API_KEY = os.environ["MOVIEDB_API_KEY"]
+IMPORTANT_CREW_JOBS = {"Director", "Cinematographer", "Executive Producer", "Writer", "Screenplay"}
+
+
+class MovieDBError(Exception):
+    """Raised when MovieDB answers with an error payload instead of the requested data."""
+
+    def __init__(self, status_code, message):
+        super().__init__(f"MovieDB returned {status_code}: {message}")
+        self.status_code = status_code
+
+
+def get_moviedb_json(request_url, endpoint):
+    """Given a MovieDB API URL and its endpoint name, return the JSON response, using the response cache when it is fresh.
+    Raises MovieDBError if MovieDB still returns an error after the HTTP client's retries."""
+
+    cached = response_cache.get(request_url, endpoint)
+    if cached is not None:
+        return json.loads(cached)
+
+    response = http_client.get(request_url)
+    if not response.ok:
+        try:
+            message = response.json().get("status_message")
+        except ValueError:
+            message = response.reason
+        raise MovieDBError(response.status_code, message)
+
+    response_cache.set(request_url, response.text)
+    return response.json()
 
 
 def get_moviedb_film_id(film_url):
@@ -17,32 +49,45 @@ def get_moviedb_film_id(film_url):
     return moviedb_id
 
 
-def parse_moviedb_film(moviedb_id, play):
-    """Given a film's MovieDB ID, process film information and return as dictionaries for user verfication."""
+def parse_moviedb_film(moviedb_id, play, progress=None):
+    """Given a film's MovieDB ID, process film information and return as dictionaries for user verfication.
+    If given, progress is called with (people done, people total) as cast and crew profiles arrive."""
 
-    moviedb_credits = "https://api.themoviedb.org/3/movie/" + str(moviedb_id) + "/credits?api_key=" + MOVIEDB_API_KEY
-    credits = requests.get(moviedb_credits).json()
-    cast_credits, crew_credits = credits["cast"], credits["crew"]
+    details = get_moviedb_film_with_credits(moviedb_id) # film details and credits arrive in a single request
+    cast_credits = details["credits"]["cast"]
+    crew_credits = [crewmember for crewmember in details["credits"]["crew"] if crewmember["job"] in IMPORTANT_CREW_JOBS]
     print(f"******************* CREWCREWCREW {crew_credits}")
 
-    film_details = parse_moviedb_film_details(moviedb_id, play) #parse MovieDB film details and create Film database object
-    cast = parse_moviedb_cast(moviedb_id, cast_credits) #parse MovieDB actor details and create Actor database objects
-    crew = parse_moviedb_crew(moviedb_id, crew_credits) #parse MovieDB crew details and create various crew database objects
+    # Fetch each person's profile once, even if they are credited as both cast and crew
+    credited_ids = [castmember["id"] for castmember in cast_credits] + [crewmember["id"] for crewmember in crew_credits]
+    profiles = parse_moviedb_people(credited_ids, progress=progress)
+
+    film_details = parse_moviedb_film_details(moviedb_id, play, details=details) #parse MovieDB film details and create Film database object
+    cast = parse_moviedb_cast(moviedb_id, cast_credits, profiles=profiles) #parse MovieDB actor details and create Actor database objects
+    crew = parse_moviedb_crew(moviedb_id, crew_credits, profiles=profiles) #parse MovieDB crew details and create various crew database objects
 
     return (film_details, cast, crew)
 
 
-def parse_moviedb_film_details(moviedb_id, play):
-    """Given a MovieDB film ID, parse and return film details as dictionary."""
+def get_moviedb_film_with_credits(moviedb_id):
+    """Given a MovieDB film ID, return the film details JSON with its cast and crew credits appended."""
+
+    details_request_url = ("https://api.themoviedb.org/3/movie/" + str(moviedb_id) + "?api_key=" + MOVIEDB_API_KEY
+                            + "&language=en-US&append_to_response=credits")
+    return get_moviedb_json(details_request_url, "movie")
+
+
+def parse_moviedb_film_details(moviedb_id, play, details=None):
+    """Given a MovieDB film ID, parse and return film details as dictionary. Film details JSON already fetched can be passed in."""
 
     film = {}
     date_format = "%Y-%m-%d"
 
-    details_request_url = "https://api.themoviedb.org/3/movie/" + str(moviedb_id) + "?api_key=" + MOVIEDB_API_KEY + "&language=en-US"
-    details = requests.get(details_request_url).json()
+    if details is None:
+        details = get_moviedb_film_with_credits(moviedb_id)
     # Watch provider information courtesy of JustWatch
     # watch_request_url = "https://api.themoviedb.org/3/movie/" + str(moviedb_id) + "/watch/providers?api_key=" + MOVIEDB_API_KEY + "&language=en-US"
-    # watch_providers = requests.get(watch_request_url).json()
+    # watch_providers = http_client.get(watch_request_url).json()
     # print(f"******************************* Watch providers: {watch_providers} ***************************")
 
     film["film_moviedb_id"] = moviedb_id
@@ -66,13 +111,19 @@ def parse_moviedb_film_details(moviedb_id, play):
 
 
 def parse_moviedb_person(moviedb_id):
-    """Given a person's MovieDB ID, parse and return person details as dictionary."""
+    """Given a person's MovieDB ID, parse and return person details as dictionary, or None if MovieDB has no such person."""
 
     person = {}
     date_format = "%Y-%m-%d"
 
     profile_request_url = "https://api.themoviedb.org/3/person/" + str(moviedb_id) + "?api_key=" + MOVIEDB_API_KEY
-    profile = requests.get(profile_request_url).json()
+    try:
+        profile = get_moviedb_json(profile_request_url, "person")
+    except MovieDBError as e:
+        if e.status_code == 404: # credited people are occasionally merged or removed on MovieDB
+            print(f"*********** PERSON {moviedb_id} NOT FOUND, skipping")
+            return None
+        raise
 
     person["person_moviedb_id"] = profile["id"]
     person["person_imdb_id"] = profile["imdb_id"]
@@ -91,14 +142,117 @@ def parse_moviedb_person(moviedb_id):
     return person
 
 
-def parse_moviedb_cast(moviedb_id, cast_credits):
-    """Given a MovieDB ID and cast credits JSON object, process cast info and return as dictionary of dictionaries."""
+def parse_moviedb_people(person_ids, max_workers=None, progress=None):
+    """Given a list of MovieDB person IDs, return a dictionary of person dictionaries in the given order. People already
+    stored in the database are read in one query; only unknown or stale profiles are fetched, concurrently, from MovieDB.
+    If given, progress is called with (people done, people total) as profiles arrive."""
+
+    person_ids = list(dict.fromkeys(person_ids)) # drop repeat credits while keeping credit order
+    people = {}
+
+    for person_id, person in iter_moviedb_people(person_ids, max_workers=max_workers):
+        people[person_id] = person
+        if progress:
+            progress(len(people), len(person_ids))
+
+    return {person_id: people[person_id] for person_id in person_ids if person_id in people}
+
+
+def iter_moviedb_people(person_ids, max_workers=None):
+    """Given a list of MovieDB person IDs, yield (ID, person dictionary) pairs as each person becomes available:
+    people stored in the database first, then MovieDB profiles in the order their requests complete."""
+
+    if max_workers is None:
+        max_workers = current_app.config["MOVIEDB_MAX_WORKERS"]
+
+    person_ids = list(dict.fromkeys(person_ids))
+    if not person_ids:
+        return
+
+    stored_people = get_stored_people(person_ids)
+    fetch_ids = [person_id for person_id in person_ids if person_id not in stored_people]
+    print(f"*********** PEOPLE: {len(stored_people)} from database, {len(fetch_ids)} from MovieDB")
+
+    for person_id in person_ids:
+        if person_id in stored_people:
+            yield person_id, stored_people[person_id]
+
+    if fetch_ids:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(parse_moviedb_person, person_id): person_id for person_id in fetch_ids}
+            for future in as_completed(futures):
+                profile = future.result()
+                if profile:
+                    yield futures[future], profile
+
+
+def iter_moviedb_film_people(moviedb_id, credits, max_workers=None):
+    """Given a MovieDB film ID and its credits JSON object, yield (ID, person dictionary) pairs as each credited
+    person's profile arrives, with their parts played and crew jobs already merged in."""
+
+    parts_played = {}
+    for castmember in credits["cast"]:
+        parts_played[castmember["id"]] = castmember["character"].split(" / ")
+
+    jobs = {}
+    for crewmember in credits["crew"]:
+        if crewmember["job"] in IMPORTANT_CREW_JOBS:
+            jobs.setdefault(crewmember["id"], []).append(crewmember["job"])
+
+    for person_id, profile in iter_moviedb_people(list(parts_played) + list(jobs), max_workers=max_workers):
+        person = dict(profile)
+        person["moviedb_id"] = moviedb_id
+        if person_id in parts_played:
+            person["parts_played"] = parts_played[person_id]
+        if person_id in jobs:
+            person["jobs"] = jobs[person_id]
+        yield person_id, person
+
+
+def get_stored_people(person_ids):
+    """Given a list of MovieDB person IDs, return person dictionaries for those already in the database and updated
+    within PERSON_STALE_DAYS, keyed by MovieDB ID. People with no last_updated time (stored before it was tracked)
+    are stale."""
+    from app.models import Person
+
+    stale_before = datetime.now() - timedelta(days=current_app.config["PERSON_STALE_DAYS"])
+    moviedb_ids = {str(person_id): person_id for person_id in person_ids} # Person.moviedb_id is stored as a string
+
+    people = Person.query.filter(Person.moviedb_id.in_(moviedb_ids.keys()) & (Person.last_updated != None)
+                                 & (Person.last_updated >= stale_before)).all()
+
+    return {moviedb_ids[person.moviedb_id]: parse_stored_person(person) for person in people}
+
+
+def parse_stored_person(person):
+    """Given a Person database object, return person details as a dictionary in the same shape as parse_moviedb_person."""
+
+    person_dict = {}
+    person_dict["person_moviedb_id"] = int(person.moviedb_id)
+    person_dict["person_imdb_id"] = person.imdb_id
+    person_dict["full_name"] = [person.fname, person.lname]
+    person_dict["fname"] = person.fname
+    person_dict["lname"] = person.lname
+    person_dict["gender"] = int(person.gender) if person.gender and person.gender.isdigit() else person.gender
+    person_dict["birthday"] = person.birthday
+    person_dict["photo_path"] = person.photo_path
+
+    return person_dict
+
+
+def parse_moviedb_cast(moviedb_id, cast_credits, profiles=None):
+    """Given a MovieDB ID and cast credits JSON object, process cast info and return as dictionary of dictionaries.
+    Person dictionaries already fetched by parse_moviedb_people can be passed in as profiles."""
     
     cast = {}
+    if profiles is None:
+        profiles = parse_moviedb_people([castmember["id"] for castmember in cast_credits])
 
     for castmember in cast_credits:
         cast_id = castmember["id"]
-        person_dict = parse_moviedb_person(cast_id)
+        if cast_id not in profiles:
+            continue
+        person_dict = dict(profiles[cast_id])
         cast[cast_id] = person_dict
         cast[cast_id]["parts_played"] = castmember["character"].split(" / ")
         cast[cast_id]["moviedb_id"] = moviedb_id
@@ -107,22 +261,59 @@ def parse_moviedb_cast(moviedb_id, cast_credits):
     return cast
 
 
-def parse_moviedb_crew(moviedb_id, crew_credits):
-    """Given a Movie record and crew credits JSON object, process crew info and return as dictionary of dictionaries."""
+def parse_moviedb_crew(moviedb_id, crew_credits, profiles=None):
+    """Given a Movie record and crew credits JSON object, process crew info and return as dictionary of dictionaries.
+    Person dictionaries already fetched by parse_moviedb_people can be passed in as profiles."""
 
     crew = {}
-    important_crew_jobs = {"Director", "Cinematographer", "Executive Producer", "Writer", "Screenplay"}
+    crew_credits = [crewmember for crewmember in crew_credits if crewmember["job"] in IMPORTANT_CREW_JOBS]
+    if profiles is None:
+        profiles = parse_moviedb_people([crewmember["id"] for crewmember in crew_credits])
 
     for crewmember in crew_credits:
-        if crewmember["job"] in important_crew_jobs:
-            crew_id = crewmember["id"]
-            if not crew_id in crew:
-                person_dict = parse_moviedb_person(crew_id)
-                crew[crew_id] = person_dict
-                crew[crew_id]["jobs"] = []
-                crew[crew_id]["moviedb_id"] = moviedb_id
-            crew[crew_id]["jobs"].append(crewmember["job"])
+        crew_id = crewmember["id"]
+        if crew_id not in profiles:
+            continue
+        if not crew_id in crew:
+            person_dict = dict(profiles[crew_id])
+            crew[crew_id] = person_dict
+            crew[crew_id]["jobs"] = []
+            crew[crew_id]["moviedb_id"] = moviedb_id
+        crew[crew_id]["jobs"].append(crewmember["job"])
 
     print(f"*********** CREW: {crew}")
     return crew
 
+
+def dump_film_import(details, people):
+    """Given parsed film details and people dictionaries, return them as a JSON-serializable dictionary."""
+
+    date_format = "%Y-%m-%d"
+
+    details = dict(details)
+    details["release_date"] = details["release_date"].strftime(date_format)
+
+    dumped_people = {}
+    for person_id, person in people.items():
+        person = dict(person)
+        if person["birthday"]:
+            person["birthday"] = person["birthday"].strftime(date_format)
+        dumped_people[person_id] = person
+
+    return {"details": details, "people": dumped_people}
+
+
+def load_film_import(film_import):
+    """Given a dictionary made by dump_film_import, return the film details and people dictionaries with dates restored."""
+
+    date_format = "%Y-%m-%d"
+
+    details = film_import["details"]
+    details["release_date"] = datetime.strptime(details["release_date"], date_format)
+
+    people = film_import["people"]
+    for person in people.values():
+        if person["birthday"]:
+            person["birthday"] = datetime.strptime(person["birthday"], date_format)
+
+    return details, people
@@ -1,16 +1,17 @@
 from sqlalchemy.sql.operators import notendswith_op
-from app import db
+from app import db, showcase, task_queue
 from app.decorators import admin_required
 from app.main.folger_parser import parse_folger_scene_descriptions
 from app.main.forms import *
-from app.main.moviedb_parser import parse_moviedb_film, get_moviedb_film_id
+from app.main.moviedb_parser import (IMPORTANT_CREW_JOBS, get_moviedb_film_id, get_moviedb_film_with_credits,
+                                    iter_moviedb_film_people, load_film_import, parse_moviedb_film_details)
 from app.main.crud import *
 from app.models import *
 from datetime import datetime
-from flask import abort, flash, g, redirect, render_template, request, session, url_for
+from flask import (abort, current_app, flash, g, jsonify, redirect, render_template, request, Response, session, 
+                    stream_with_context, url_for)
 from flask_login import current_user, login_required
 from markupsafe import Markup
-from mergedeep import merge
 from . import main
 
 
@@ -26,13 +27,7 @@ def before_request():
 def index():
     """Display index page."""
 
-    index_options = {"plays": Play, "scenes": Scene, "characters": Character, "films": Film, 
-                "people": Person, "questions": Question, "interpretations": Interpretation}
-    random_options = {}
-
-    for key, value in index_options.items():
-        print(key, value)
-        random_options[key] = get_random_image(index_options[key])
+    random_options = showcase.current()
 
     title = "Home"
     return render_template("index.html",
@@ -53,8 +48,16 @@ def browse():
 def admin_index():
     """Display administrator-facing index page; return 403 if user not an admin."""
 
+    seed_form = SeedPlaysForm()
+    if seed_form.validate_on_submit():
+        task_queue.enqueue("seed_plays", user=current_user)
+        flash("Seeding all plays from Folger in the background.")
+        return redirect("/admin")
+
+    seed_task = BackgroundTask.query.filter(BackgroundTask.name == "seed_plays").order_by(BackgroundTask.id.desc()).first()
+
     title="Admin"
-    return render_template("admin.html", title=title)
+    return render_template("admin.html", seed_form=seed_form, seed_task=seed_task, title=title)
 
 
 @main.route("/edit-profile", methods=["GET", "POST"])
@@ -228,7 +231,9 @@ def add_scenes(shortname=None):
             return redirect("/scenes/add/")
         
         play = get_play_by_shortname(shortname)
-        scenes = parse_folger_scene_descriptions(play)
+        scenes = get_all_scenes_by_play(play)
+        if any(not scene.description for scene in scenes): # Only fetch synopses the database doesn't already have
+            scenes = parse_folger_scene_descriptions(play)
 
         title = "Add Scenes"
         return render_template("scenes-edit.html", play=play, scenes=scenes, title=title)
@@ -259,25 +264,29 @@ def edit_scenes(shortname=None, id=None):
         scene_count = request.form.get("scene_count")
         scene_count = int(scene_count) + 1
 
-        for i in range(scene_count):
-            scene_id = request.form.get(f"id-{i}")
-            act_num = request.form.get(f"act-{i}")
-            scene_num = request.form.get(f"scene-{i}")
-            title = request.form.get(f"title-{i}")
-            description = request.form.get(f"description-{i}")
-            quote = request.form.get(f"quote-{i}")
-            quote_character = request.form.get(f"quote-character-{i}")
-            if quote_character:
-                character = Character.query.get(quote_character)
-            
-            existing_scene = Scene.query.get(scene_id)
-            if existing_scene:
-                scene = update_scene(scene=existing_scene, title=title, description=description)
-            else:
-                scene = add_scene(act=act_num, scene=scene_num, play=play, title=title, description=description)
-
-            if quote and quote_character:
-                add_quote(play=play, character=character, scene=scene, text=quote)
+        # Load the play's scenes and characters once and look the form's ids up here, instead of one query per row
+        scenes = {scene.id: scene for scene in Scene.query.filter(Scene.play_id == play.id)}
+        characters = {character.id: character for character in Character.query.filter(Character.play_id == play.id)}
+
+        with batch(): # one transaction for the whole form
+            for i in range(scene_count):
+                scene_id = request.form.get(f"id-{i}", type=int)
+                act_num = request.form.get(f"act-{i}")
+                scene_num = request.form.get(f"scene-{i}")
+                title = request.form.get(f"title-{i}")
+                description = request.form.get(f"description-{i}")
+                quote = request.form.get(f"quote-{i}")
+                quote_character = request.form.get(f"quote-character-{i}", type=int)
+                character = characters.get(quote_character)
+
+                existing_scene = scenes.get(scene_id)
+                if existing_scene:
+                    scene = update_scene(scene=existing_scene, title=title, description=description)
+                else:
+                    scene = add_scene(act=act_num, scene=scene_num, play=play, title=title, description=description)
+
+                if quote and character:
+                    add_quote(play=play, character=character, scene=scene, text=quote)
 
         return redirect(f"/scenes/{shortname}/")
 
@@ -404,23 +413,28 @@ def edit_characters(shortname=None, id=None):
         play = get_play_by_shortname(shortname)
         character_count = request.form.get("character_count")
         character_count = int(character_count) + 1
-    
-        for i in range(character_count):
-            character_id = request.form.get(f"id-{i}")
-            name = request.form.get(f"name-{i}")
-            gender = request.form.get(f"gender-{i}")
-            quote = request.form.get(f"quote-{i}")
-            quote_scene = request.form.get(f"quote-scene-{i}")
-            scene = Scene.query.get(quote_scene)
-
-            existing_character = Character.query.get(character_id)
-            if existing_character:
-                character = update_character(character=existing_character, name=name, gender=gender, img=img)
-            else:
-                character = add_character(name=name, play=play, gender=gender)
 
-            if quote and scene:
-                add_quote(play=play, character=character, scene=scene, text=quote)
+        # Load the play's characters and scenes once and look the form's ids up here, instead of one query per row
+        characters = {character.id: character for character in Character.query.filter(Character.play_id == play.id)}
+        scenes = {scene.id: scene for scene in Scene.query.filter(Scene.play_id == play.id)}
+
+        with batch(): # one transaction for the whole form
+            for i in range(character_count):
+                character_id = request.form.get(f"id-{i}", type=int)
+                name = request.form.get(f"name-{i}")
+                gender = request.form.get(f"gender-{i}")
+                quote = request.form.get(f"quote-{i}")
+                quote_scene = request.form.get(f"quote-scene-{i}", type=int)
+                scene = scenes.get(quote_scene)
+
+                existing_character = characters.get(character_id)
+                if existing_character:
+                    character = update_character(character=existing_character, name=name, gender=gender)
+                else:
+                    character = add_character(name=name, play=play, gender=gender)
+
+                if quote and scene:
+                    add_quote(play=play, character=character, scene=scene, text=quote)
 
         title = Markup(f"Edit <em>{play.title}</em> Characters")
         return redirect(f"/characters/{shortname}/")
@@ -822,7 +836,7 @@ def view_people(shortname=None, id=None):
         if request.method == "POST":
             if form.play.data != "All":
                 play_id = int(form.play.data)
-                play = Play.query.get(play_id)
+                play = get_play_by_id(play_id)
                 form = make_person_facet_form(play)
             if form.character.data != "All":
                 character_id = int(form.character.data)
@@ -946,7 +960,7 @@ def view_plays(shortname=None, id=None):
             play = get_play_by_shortname(shortname)
 
         elif id:
-            play = Play.query.get(id)
+            play = get_play_by_id(id)
 
         scenes = get_all_scenes_by_play(play)
 
@@ -954,7 +968,7 @@ def view_plays(shortname=None, id=None):
         return render_template("play.html", play=play, title=title, scenes=scenes)
         
     else:
-        plays = Play.query.all()
+        plays = get_all_plays()
 
         title = "Plays"
         return render_template("plays-view.html", plays=plays, title=title)
@@ -988,22 +1002,26 @@ def view_films(shortname=None, id=None):
                 elif sort_order == "year_desc":
                         films = Film.query.filter(Film.play_id == play.id).order_by(Film.release_date.desc()).all()
 
+        summaries = get_film_summaries(films or [])
         title = Markup(f"<em>{play.title}</em> Films")
-        return render_template("films-view.html", form=form, films=films, play=play, title=title)
+        return render_template("films-view.html", form=form, films=films, play=play, summaries=summaries, title=title)
 
     if id:
-        film = Film.query.get(id)
-        play = film.play
-        cast = db.session.query(CharacterActor).join(Person, Character).filter((Person.id == CharacterActor.person_id) & (CharacterActor.film_id == film.id)).order_by(Character.id).all()
-        crew = db.session.query(PersonJob).join(Film, Job, Person).filter((PersonJob.person_id == Person.id) & (PersonJob.film_id == film.id) & (PersonJob.job_id == Job.id) & (Job.title != "Actor")).order_by(Person.lname).all()
+        # Load everything film.html renders up front, so the page's query count doesn't grow with the cast
+        film = get_film_by_id(id)
+        if film is None:
+            abort(404)
+        play = get_play_by_film(film)
+        cast = get_film_cast(film)
+        crew = get_film_crew(film)
+        directors = [person_job.people for person_job in crew if person_job.job.title == "Director"]
         hamlet_age = None
         if play.title == "Hamlet":
-            hamlet = Character.query.filter(Character.name == "Hamlet").first()
-            hamlet_actor = film.get_actor("Hamlet")
+            hamlet_actor = next((castmember.person for castmember in cast if castmember.character.name == "Hamlet"), None)
             hamlet_age = calculate_age_during_film(hamlet_actor, film)
 
         title = f"{film.title} - {film.release_date}"
-        return render_template("film.html", film=film, play=play, cast=cast, crew=crew, 
+        return render_template("film.html", film=film, play=play, cast=cast, crew=crew, directors=directors,
                     hamlet_age=hamlet_age, title=title)
         
     else:
@@ -1032,13 +1050,15 @@ def view_films(shortname=None, id=None):
             else:
                 films = Film.query.order_by(Film.release_date).all()
 
+            summaries = get_film_summaries(films)
             title = "Films"
-            return render_template("films-view.html", films=films, form=form, title=title)
+            return render_template("films-view.html", films=films, form=form, summaries=summaries, title=title)
 
 
     films = Film.query.all()
+    summaries = get_film_summaries(films)
     title = "Films"
-    return render_template("films-view.html", films=films, form=form, title=title)
+    return render_template("films-view.html", films=films, form=form, summaries=summaries, title=title)
 
 
 @main.route("/films/add")
@@ -1054,25 +1074,78 @@ def add_films():
 
 @main.route("/process-film/")
 def process_film():
-    """Given a MovieDB film URL by the user, query the MovieDB API for film info and pass to verification page."""
+    """Given a MovieDB film URL by the user, queue a MovieDB import of the film and redirect to its progress page."""
 
     play_shortname = request.args.get("play_titles")
     play = get_play_by_shortname(play_shortname)
-    if not play.characters and not play.scenes:
-        seed_play(play)
     film_url = request.args.get("film-url")
 
     film_id = get_moviedb_film_id(film_url)
-    details, cast, crew = parse_moviedb_film(film_id, play)
-    people = merge({}, cast, crew)
 
-    character_names = [character.name for character in play.characters]
-    character_names.sort()
-    crew_jobs = {"Director", "Cinematographer", "Executive Producer", "Screenplay", "Writer"}
+    if not play.characters and not play.scenes:
+        task_queue.enqueue("seed_plays", user=current_user, shortnames=[play.shortname])
+        flash(f"{play.title} hasn't been seeded from Folger yet. It is being seeded in the background; "
+              "add the film again once that has finished.", "warning")
+        return redirect("/films/add")
+
+    if request.args.get("stream"):
+        return stream_film_verification(film_id, play)
+
+    task = task_queue.enqueue("film_import", user=current_user, moviedb_id=film_id, play_id=play.id)
+
+    return redirect(f"/process-film/{task.id}/")
+
+
+def film_verification_context(play):
+    """Given a play, return the template context both film verification pages share: the play's sorted character names
+    to cast parts as, and the crew jobs worth importing."""
 
-    title = "Verify Film Information"
-    return render_template("films-verify.html", details=details, people=people,
-                            play=play, genders=GENDERS, character_names=character_names, crew_jobs=crew_jobs, title=title)
+    character_names = sorted(character.name for character in play.characters)
+    return dict(play=play, genders=GENDERS, character_names=character_names, crew_jobs=IMPORTANT_CREW_JOBS,
+                title="Verify Film Information")
+
+
+def stream_film_verification(film_id, play):
+    """Stream the verification page for a film: film details first, then each cast or crew member as their MovieDB profile arrives."""
+
+    moviedb_details = get_moviedb_film_with_credits(film_id)
+    details = parse_moviedb_film_details(film_id, play, details=moviedb_details)
+    people = iter_moviedb_film_people(film_id, moviedb_details["credits"])
+
+    context = dict(details=details, people=people, **film_verification_context(play))
+    current_app.update_template_context(context)
+    template = current_app.jinja_env.get_template("films-verify.html")
+
+    response = Response(stream_with_context(template.generate(context)))
+    response.headers["X-Accel-Buffering"] = "no" # stop nginx holding the page back until it is complete
+    return response
+
+
+@main.route("/process-film/<int:task_id>/")
+def verify_film(task_id):
+    """Display import progress for a queued film import, then the verification page once its MovieDB data is ready."""
+
+    task = BackgroundTask.query.get_or_404(task_id)
+
+    if task.status == BackgroundTask.FAILED:
+        flash(f"Film import failed: {task.error}", "danger")
+        return redirect("/films/add")
+    elif task.status != BackgroundTask.COMPLETE:
+        title = "Importing Film"
+        return render_template("films-import.html", task=task, title=title)
+
+    details, people = load_film_import(task.get_result())
+    play = get_play_by_id(details["play_id"])
+
+    return render_template("films-verify.html", details=details, people=people.items(), **film_verification_context(play))
+
+
+@main.route("/process-film/<int:task_id>/status")
+def film_import_status(task_id):
+    """Return the status and progress (people fetched / total) of a queued film import as JSON."""
+
+    task = BackgroundTask.query.get_or_404(task_id)
+    return jsonify(task.to_dict())
 
 
 @main.route("/add-film-to-db/", methods = ["POST"])
@@ -1092,54 +1165,43 @@ def add_film_to_db():
     film["film_imdb_id"] = request.form.get("film_imdb_id")
     # film["watch_providers"] = request.form.get("watch_providers") # seeing persistent errors with watch_providers saving
 
-    play = get_play_by_title(film["play"])
-    db_film = get_film(play=play, moviedb_id=film["film_moviedb_id"], imdb_id=film["film_imdb_id"], title=film["title"], 
-                        release_date=film["release_date"], language=film["language"], length=film["length"], overview=film["overview"], 
-                        poster_path=film["poster_path"])
-    
-
+    people = {}
     person_count = request.form.get("person_count")
     person_count = int(person_count) + 1
     for i in range(person_count):
+        if request.form.get(f"exclude-{i}"):
+            continue
+
         person = {}
-        person["exclude"] = request.form.get(f"exclude-{i}")
-
-        if not person["exclude"]:
-            person["fname"] = request.form.get(f"fname-{i}")
-            person["lname"] = request.form.get(f"lname-{i}")
-            person["photo_path"] = request.form.get(f"photo_path-{i}")
-            person["birthday"] = request.form.get(f"birthday-{i}")
-            if not person["birthday"]:
-                person["birthday"] = None
-            person["gender"] = request.form.get(f"gender-{i}")
-            person["moviedb_id"] = request.form.get(f"person_moviedb_id-{i}")
-            person["imdb_id"] = request.form.get(f"person_imdb_id-{i}")
-
-            person["parts"] = []
-            part_count = request.form.get(f"part_count-{i}")
-            if part_count:
-                part_count = int(part_count) + 1
-                for j in range(part_count):
-                    if not request.form.get(f"part-exclude-{i}-{j}"):
-                        person["parts"].append(request.form.get(f"part-{i}-{j}"))
-
-            person["jobs"] = []
-            job_count = request.form.get(f"job_count-{i}")
-            if job_count:
-                job_count = int(job_count) + 1
-                for j in range(job_count):
-                    person["jobs"].append(request.form.get(f"job-{i}-{j}"))
-
-            db_person = get_person(person["moviedb_id"], person["imdb_id"], person["fname"], person["lname"], person["birthday"], person["gender"], person["photo_path"])
-            if person["parts"]:
-                get_person_job(db_person, db_film, "Actor")
-                for part_name in person["parts"]:
-                    get_character_actor(person=db_person, character_name=part_name, film=db_film)
-            if person["jobs"]:
-                for job in person["jobs"]:
-                    get_person_job(db_person, db_film, job)
-
-    title = "Add Film"
+        person["fname"] = request.form.get(f"fname-{i}")
+        person["lname"] = request.form.get(f"lname-{i}")
+        person["photo_path"] = request.form.get(f"photo_path-{i}")
+        person["birthday"] = request.form.get(f"birthday-{i}")
+        person["gender"] = request.form.get(f"gender-{i}")
+        person["person_moviedb_id"] = request.form.get(f"person_moviedb_id-{i}")
+        person["person_imdb_id"] = request.form.get(f"person_imdb_id-{i}")
+
+        person["parts_played"] = []
+        part_count = request.form.get(f"part_count-{i}")
+        if part_count:
+            part_count = int(part_count) + 1
+            for j in range(part_count):
+                if not request.form.get(f"part-exclude-{i}-{j}"):
+                    person["parts_played"].append(request.form.get(f"part-{i}-{j}"))
+
+        person["jobs"] = []
+        job_count = request.form.get(f"job_count-{i}")
+        if job_count:
+            job_count = int(job_count) + 1
+            for j in range(job_count):
+                person["jobs"].append(request.form.get(f"job-{i}-{j}"))
+
+        people[person["person_moviedb_id"]] = person
+
+    # Parts were picked from the play's characters on the verify page, so any other name is a new character
+    play = get_play_by_title(film["play"])
+    db_film = add_imported_film(play, film, people, part_policy="create")
+
     return redirect(f"/films/{db_film.id}")
 
 
@@ -1,10 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from flask import current_app
 from .. import db
-from .crud import create_user, get_user_by_email
-from ..models import User, Role
+from .crud import bulk_add, create_user, get_user_by_email, index_records
+from .folger_parser import folger_page_url, get_folger_page, parse_folger_characters, parse_folger_scenes, parse_folger_synopses
+from ..models import Character, Play, Scene, User, Role
+import gzip
+import json
 import os
+import time
 from werkzeug.security import generate_password_hash
 
+FOLGER_PAGE_NAMES = ("charText", "scenes", "synopsis")
+FOLGER_SNAPSHOT_VERSION = 1
+
 def make_admin():
     """Create admin account if it doesn't exist."""
     
@@ -27,4 +36,165 @@ def make_admin():
         admin.confirmed = True
         db.session.add(admin)
         db.session.commit()
-        return admin
\ No newline at end of file
+        return admin
+
+
+def fetch_play_pages(shortnames, workers=None):
+    """Given play shortnames, download each play's Folger character, scene and synopsis pages concurrently.
+    Yield (shortname, pages, error) in the order given, as soon as each play's pages are in."""
+
+    workers = workers or current_app.config["FOLGER_MAX_WORKERS"]
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="folger") as executor:
+        # Queue every page up front so downloads for later plays overlap with work on earlier ones
+        page_futures = {shortname: {page_name: executor.submit(get_folger_page, folger_page_url(shortname, page_name))
+                                    for page_name in FOLGER_PAGE_NAMES}
+                        for shortname in shortnames}
+
+        for shortname in shortnames:
+            try:
+                pages = {page_name: future.result() for page_name, future in page_futures[shortname].items()}
+            except Exception as e:
+                yield shortname, None, e
+            else:
+                yield shortname, pages, None
+
+
+def parse_play_pages(pages):
+    """Given a play's downloaded Folger pages, return its characters as a list of (name, word count) and its scenes
+    as a list of (act, scene, synopsis)."""
+
+    characters = [(name, int(word_count)) for name, word_count in parse_folger_characters(None, page=pages["charText"]).values()]
+
+    synopses = parse_folger_synopses(pages["synopsis"])
+    scenes = []
+    for folger_scene in parse_folger_scenes(None, page=pages["scenes"]).values():
+        act, scene = int(folger_scene["act"]), int(folger_scene["scene"])
+        scenes.append((act, scene, synopses.get((act, scene))))
+
+    return characters, scenes
+
+
+def seed_plays(shortnames=None, workers=None, progress=None):
+    """Given play shortnames (default: every play in play_titles), download each play's Folger character, scene and
+    synopsis pages concurrently and write each play's characters and scenes in its own transaction.
+    Return a list of report rows with shortname, characters and scenes added, or error."""
+
+    from .forms import play_titles
+
+    shortnames = list(shortnames or play_titles.keys())
+
+    report = []
+    for count, (shortname, pages, error) in enumerate(fetch_play_pages(shortnames, workers), start=1):
+        try:
+            if error:
+                raise error
+            characters, scenes = parse_play_pages(pages)
+            new_records = write_play_seeds({shortname: (play_titles[shortname], characters, scenes)})
+            db.session.commit()
+            report.append({"shortname": shortname, "characters": len(new_records[Character]), "scenes": len(new_records[Scene])})
+        except Exception as e:
+            db.session.rollback()
+            report.append({"shortname": shortname, "error": str(e)})
+        if progress:
+            progress(count, len(shortnames))
+
+    return report
+
+
+def write_play_seeds(play_seeds, index=True):
+    """Given a dictionary of play shortnames to (title, characters, scenes) as returned by parse_play_pages, add any
+    plays, characters and scenes missing from the database with one bulk insert per table, and fill in missing scene
+    descriptions. Doesn't commit. Return a dictionary of the new Play, Character and Scene records by model."""
+
+    plays = {play.shortname: play for play in Play.query.filter(Play.shortname.in_(play_seeds.keys()))}
+    play_rows = [{"title": title, "shortname": shortname} for shortname, (title, characters, scenes) in play_seeds.items()
+                 if shortname not in plays]
+    new_plays = bulk_add(Play, play_rows, index=index)
+    for play in new_plays:
+        plays[play.shortname] = play
+    play_ids = [play.id for play in plays.values()]
+
+    character_names = set(db.session.query(Character.play_id, Character.name).filter(Character.play_id.in_(play_ids)))
+    scenes = {(scene.play_id, scene.act, scene.scene): scene for scene in Scene.query.filter(Scene.play_id.in_(play_ids))}
+    character_rows = []
+    scene_rows = []
+
+    for shortname, (title, play_characters, play_scenes) in play_seeds.items():
+        play_id = plays[shortname].id
+
+        for name, word_count in play_characters:
+            if (play_id, name) not in character_names:
+                character_names.add((play_id, name))
+                character_rows.append({"name": name, "gender": 2, "word_count": word_count, "play_id": play_id})
+
+        for act, scene_number, description in play_scenes:
+            key = (play_id, act, scene_number)
+            if key not in scenes:
+                scenes[key] = None
+                scene_rows.append({"act": act, "scene": scene_number, "description": description, "play_id": play_id})
+            elif scenes[key] and description and not scenes[key].description:
+                scenes[key].description = description
+
+    new_characters = bulk_add(Character, character_rows, index=index)
+    new_scenes = bulk_add(Scene, scene_rows, index=index)
+
+    print(f"********* Seeded {len(play_seeds)} plays: {len(new_characters)} characters, {len(new_scenes)} scenes *********")
+    return {Play: new_plays, Character: new_characters, Scene: new_scenes}
+
+
+def export_folger_snapshot(path, shortnames=None, workers=None):
+    """Given a file path, download and parse every play's (or the given plays') Folger pages and save the parsed
+    characters and scenes as a gzipped, versioned JSON snapshot. Return the number of plays saved."""
+
+    from .forms import play_titles
+
+    shortnames = list(shortnames or play_titles.keys())
+
+    plays = []
+    for shortname, pages, error in fetch_play_pages(shortnames, workers):
+        if error:
+            raise error
+        characters, scenes = parse_play_pages(pages)
+        plays.append({"shortname": shortname, "title": play_titles[shortname], "characters": characters, "scenes": scenes})
+
+    snapshot = {"version": FOLGER_SNAPSHOT_VERSION, "source": "folgerdigitaltexts.org",
+                "created": datetime.now().strftime("%Y-%m-%d"), "plays": plays}
+
+    snapshot_dir = os.path.dirname(path)
+    if snapshot_dir:
+        os.makedirs(snapshot_dir, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as snapshot_file:
+        json.dump(snapshot, snapshot_file, ensure_ascii=False, separators=(",", ":"))
+
+    return len(plays)
+
+
+def load_folger_snapshot(path):
+    """Given the path of a snapshot saved by export_folger_snapshot, add every play's missing characters and scenes
+    in a single transaction, without any network access, then add them to the search index. Return a report with
+    the numbers of plays, characters and scenes added and the load and index times."""
+
+    start = time.perf_counter()
+
+    with gzip.open(path, "rt", encoding="utf-8") as snapshot_file:
+        snapshot = json.load(snapshot_file)
+
+    if snapshot.get("version") != FOLGER_SNAPSHOT_VERSION:
+        raise ValueError(f"{path} is a version {snapshot.get('version')} Folger snapshot; expected version {FOLGER_SNAPSHOT_VERSION}.")
+
+    play_seeds = {play["shortname"]: (play["title"], play["characters"], play["scenes"]) for play in snapshot["plays"]}
+    new_records = write_play_seeds(play_seeds, index=False)
+    new_ids = {model: [record.id for record in records] for model, records in new_records.items()}
+    db.session.commit()
+    load_time = time.perf_counter() - start
+
+    # Search indexing takes longer than the load itself, so it waits until the rows are committed and usable
+    start = time.perf_counter()
+    for model, ids in new_ids.items():
+        if ids:
+            index_records(model.query.filter(model.id.in_(ids)).all())
+    index_time = time.perf_counter() - start
+
+    return {"plays": len(play_seeds), "characters": len(new_ids[Character]), "scenes": len(new_ids[Scene]),
+            "load_time": load_time, "index_time": index_time}
@@ -0,0 +1,29 @@
+"""Background task handlers for slow imports from external APIs."""
+
+from app import task_queue
+from app.main.moviedb_parser import dump_film_import, parse_moviedb_film
+from app.main.seed import seed_plays
+from app.models import Play
+from mergedeep import merge
+
+
+@task_queue.handler("film_import")
+def import_film(task, moviedb_id, play_id):
+    """Given a MovieDB film ID and play ID, fetch the film's details, cast and crew for the verification page."""
+
+    play = Play.query.get(play_id)
+    if not play.characters and not play.scenes:
+        raise RuntimeError(f"{play.title} hasn't been seeded from Folger yet; seed this play first.")
+
+    details, cast, crew = parse_moviedb_film(moviedb_id, play, progress=task.update_progress)
+    people = merge({}, cast, crew)
+
+    return dump_film_import(details, people)
+
+
+@task_queue.handler("seed_plays")
+def seed_all_plays(task, shortnames=None):
+    """Seed the plays with the given shortnames (every play by default) with characters and scenes from the Folger
+    Digital Texts."""
+
+    return seed_plays(shortnames, progress=task.update_progress)
@@ -12,6 +12,7 @@ from sqlalchemy.ext.hybrid import hybrid_property, hybrid_method
 from sqlalchemy.orm import backref, relationship, reconstructor
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
+import json
 import os
 
 db = SQLAlchemy()
@@ -24,13 +25,14 @@ class CharacterActor(db.Model):
     """Relationship between a character and a person cast to play them."""
 
     __tablename__ = "character_actors"
+    __table_args__ = (db.UniqueConstraint("person_id", "character_id", "film_id", name="character_actors_person_character_film_key"),)
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     person_id = db.Column(db.Integer, db.ForeignKey("people.id"))
     person = db.relationship("Person", back_populates="character_actors")
-    character_id = db.Column(db.Integer, db.ForeignKey("characters.id"))
+    character_id = db.Column(db.Integer, db.ForeignKey("characters.id"), index=True)
     character = db.relationship("Character")
-    film_id = db.Column(db.Integer, db.ForeignKey("films.id"))
+    film_id = db.Column(db.Integer, db.ForeignKey("films.id"), index=True)
     film = db.relationship("Film")
     img = db.Column(db.String(500))
 
@@ -50,10 +52,11 @@ class CharacterInterpretation(db.Model):
     """Relationships between a character and a film interpretation."""
 
     __tablename__ = "character_interpretations"
+    __table_args__ = (db.UniqueConstraint("character_id", "interpretation_id", name="character_interpretations_character_interpretation_key"),)
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     character_id = db.Column(db.Integer, db.ForeignKey("characters.id"))
-    interpretation_id = db.Column(db.Integer, db.ForeignKey("interpretations.id"))
+    interpretation_id = db.Column(db.Integer, db.ForeignKey("interpretations.id"), index=True)
 
     def __repr__(self):
             return f"<CHARACTERINTERPRETATION id={self.id} {self.character_id} {self.scene_id}>"
@@ -63,10 +66,11 @@ class CharacterQuestion(db.Model):
     """Relationship between a character and a textual question."""
 
     __tablename__ = "character_questions"
+    __table_args__ = (db.UniqueConstraint("character_id", "question_id", name="character_questions_character_question_key"),)
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     character_id = db.Column(db.Integer, db.ForeignKey("characters.id"), primary_key=True)
-    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), primary_key=True, index=True)
 
     def __repr__(self):
             return f"<CHARACTERQUESTION id={self.id} {self.character_id} {self.question_id}>"
@@ -76,11 +80,12 @@ class CharacterQuote(db.Model):
     """Relationship between a character and quote."""
 
     __tablename__ = "character_quotes"
+    __table_args__ = (db.UniqueConstraint("character_id", "quote_id", name="character_quotes_character_quote_key"),)
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     character_id = db.Column(db.Integer, db.ForeignKey("characters.id"), primary_key=True)
-    quote_id = db.Column(db.Integer, db.ForeignKey("quotes.id"), primary_key=True)
-    scene_id = db.Column(db.Integer, db.ForeignKey("scenes.id"), primary_key=True)
+    quote_id = db.Column(db.Integer, db.ForeignKey("quotes.id"), primary_key=True, index=True)
+    scene_id = db.Column(db.Integer, db.ForeignKey("scenes.id"), primary_key=True, index=True)
 
     def __repr__(self):
             return f"<CHARACTERQUOTE id={self.id} {self.character_id} {self.scene_id}>"
@@ -90,10 +95,11 @@ class CharacterScene(db.Model):
     """Relationship between a character and scene."""
 
     __tablename__ = "character_scenes"
+    __table_args__ = (db.UniqueConstraint("character_id", "scene_id", name="character_scenes_character_scene_key"),)
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     character_id = db.Column(db.Integer, db.ForeignKey("characters.id"), primary_key=True)
-    scene_id = db.Column(db.Integer, db.ForeignKey("scenes.id"), primary_key=True)
+    scene_id = db.Column(db.Integer, db.ForeignKey("scenes.id"), primary_key=True, index=True)
 
     def __repr__(self):
             return f"<CHARACTERSCENE id={self.id} {self.character_id} {self.scene_id}>"
@@ -103,10 +109,11 @@ class CharacterTopic(db.Model):
     """Relationships between a character and a topic."""
 
     __tablename__ = "character_topics"
+    __table_args__ = (db.UniqueConstraint("character_id", "topic_id", name="character_topics_character_topic_key"),)
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     character_id = db.Column(db.Integer, db.ForeignKey("characters.id"), primary_key=True)
-    topic_id = db.Column(db.Integer, db.ForeignKey("topics.id"), primary_key=True)
+    topic_id = db.Column(db.Integer, db.ForeignKey("topics.id"), primary_key=True, index=True)
 
     def __repr__(self):
             return f"<CHARACTERTOPIC id={self.id} {self.topic_id} {self.character_id}>"
@@ -116,11 +123,13 @@ class PersonJob(db.Model):
     """Relationship between a person and a film job."""
 
     __tablename__ = "person_jobs"
+    __table_args__ = (db.UniqueConstraint("person_id", "film_id", "job_id", name="person_jobs_person_film_job_key"),
+                      db.Index("ix_person_jobs_film_id_job_id", "film_id", "job_id"))
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     film_id = db.Column(db.Integer, db.ForeignKey("films.id"), primary_key=True)
     film = db.relationship("Film", back_populates="person_jobs")
-    job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey("jobs.id"), primary_key=True, index=True)
     job = db.relationship("Job", back_populates="person_jobs")
     person_id = db.Column(db.Integer, db.ForeignKey("people.id"), primary_key=True)
     people = db.relationship("Person", back_populates="person_jobs")
@@ -136,10 +145,11 @@ class SceneInterpretation(db.Model):
     """Relationship between a scene and a film interpretation."""
 
     __tablename__ = "scene_interpretations"
+    __table_args__ = (db.UniqueConstraint("scene_id", "interpretation_id", name="scene_interpretations_scene_interpretation_key"),)
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     scene_id = db.Column(db.Integer, db.ForeignKey("scenes.id"), primary_key=True)
-    interpretation_id = db.Column(db.Integer, db.ForeignKey("interpretations.id"), primary_key=True)
+    interpretation_id = db.Column(db.Integer, db.ForeignKey("interpretations.id"), primary_key=True, index=True)
 
     def __repr__(self):
             return f"<SCENEINTERPRETATION id={self.id} {self.question_id} {self.scene_id}>"
@@ -149,10 +159,11 @@ class SceneQuestion(db.Model):
     """Relationship between a scene and a textual question."""
 
     __tablename__ = "scene_questions"
+    __table_args__ = (db.UniqueConstraint("scene_id", "question_id", name="scene_questions_scene_question_key"),)
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     scene_id = db.Column(db.Integer, db.ForeignKey("scenes.id"), primary_key=True)
-    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), primary_key=True, index=True)
 
     def __repr__(self):
             return f"<SCENEQUESTION id={self.id} {self.question_id} {self.scene_id}>"
@@ -162,10 +173,11 @@ class SceneTopic(db.Model):
     """Relationships a scene and a topic."""
 
     __tablename__ = "scene_topics"
+    __table_args__ = (db.UniqueConstraint("scene_id", "topic_id", name="scene_topics_scene_topic_key"),)
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     scene_id = db.Column(db.Integer, db.ForeignKey("scenes.id"), primary_key=True)
-    topic_id = db.Column(db.Integer, db.ForeignKey("topics.id"), primary_key=True)
+    topic_id = db.Column(db.Integer, db.ForeignKey("topics.id"), primary_key=True, index=True)
 
     def __repr__(self):
             return f"<SCENETOPIC id={self.id} {self.scene_id} {self.topic_id}>"
@@ -185,6 +197,7 @@ class Character(db.Model):
 
     __tablename__ = "characters"
     __searchable__ = ["name"]
+    __table_args__ = (db.UniqueConstraint("play_id", "name", name="characters_play_name_key"),)
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -223,7 +236,7 @@ class Film(db.Model):
     length = db.Column(db.Integer)
     overview = db.Column(db.Text)
     # tagline = db.Column(db.Text)
-    play_id = db.Column(db.Integer, db.ForeignKey("plays.id"))
+    play_id = db.Column(db.Integer, db.ForeignKey("plays.id"), index=True)
     poster_path = db.Column(db.String(100))
     release_date = db.Column(db.Date, nullable=False)
     # watch_providers = db.Column(db.Text)
@@ -260,12 +273,12 @@ class Interpretation(db.Model):
     time_start = db.Column(db.Integer, info={"label": "Starting Timestamp"})
     time_end = db.Column(db.Integer, info={"label": "Ending Timestamp"})
     description = db.Column(db.Text, info={"label": "Description"})
-    play_id = db.Column(db.Integer, db.ForeignKey("plays.id"))
+    play_id = db.Column(db.Integer, db.ForeignKey("plays.id"), index=True)
     play = db.relationship("Play", back_populates="interpretations")
-    film_id = db.Column(db.Integer, db.ForeignKey("films.id"))
+    film_id = db.Column(db.Integer, db.ForeignKey("films.id"), index=True)
     film = db.relationship("Film", back_populates="interpretations")
     # characters = db.relationship("Character", secondary="character_interpretations", back_populates="interpretations")
-    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), info={"label": "Question ID"})
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), index=True, info={"label": "Question ID"})
     question = db.relationship("Question", info={"label": "Question"})
     scenes = db.relationship("Scene", secondary="scene_interpretations", foreign_keys=[SceneInterpretation.interpretation_id, SceneInterpretation.scene_id], info={"label": "Scenes"})
     img = db.Column(db.String(500))
@@ -311,6 +324,7 @@ class Person(db.Model):
     birthday = db.Column(db.Date)
     gender = db.Column(db.String(10))
     photo_path = db.Column(db.String(500))
+    last_updated = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     jobs = db.relationship("Job", secondary="person_jobs", back_populates="people")
     person_jobs = db.relationship("PersonJob", back_populates="people")
     parts = db.relationship("Character", secondary="character_actors", back_populates="played_by", cascade="all")
@@ -333,7 +347,7 @@ class Play(db.Model):
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     title = db.Column(db.String(250))
-    shortname = db.Column(db.String(10))
+    shortname = db.Column(db.String(10), unique=True)
     characters = db.relationship("Character", back_populates="play")
     questions = db.relationship("Question", back_populates="play")
     scenes = db.relationship("Scene", back_populates="play")
@@ -357,7 +371,7 @@ class Question(db.Model):
     __searchable__ = ["title", "description"]
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True, info={"label": "ID"})
-    play_id = db.Column(db.Integer, db.ForeignKey("plays.id"))
+    play_id = db.Column(db.Integer, db.ForeignKey("plays.id"), index=True)
     play = db.relationship("Play", back_populates="questions")
     title = db.Column(db.String(1000), nullable=False, info={"label": "Title"})
     description = db.Column(db.Text, info={"label": "Description"})
@@ -377,6 +391,7 @@ class Scene(db.Model):
 
     __tablename__ = "scenes"
     __searchable__ = ["title", "description"]
+    __table_args__ = (db.UniqueConstraint("play_id", "act", "scene", name="scenes_play_act_scene_key"),)
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     act = db.Column(db.Integer, nullable=False)
@@ -429,11 +444,11 @@ class Quote(db.Model):
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     text = db.Column(db.Text)
-    play_id = db.Column(db.Integer, db.ForeignKey("plays.id"))
+    play_id = db.Column(db.Integer, db.ForeignKey("plays.id"), index=True)
     play = db.relationship("Play", back_populates="quotes")
     # character_id = db.Column(db.Integer, db.ForeignKey("characters.id"))
     # character = db.relationship("Character", back_populates="quotes")
-    scene_id = db.Column(db.Integer, db.ForeignKey("scenes.id"))
+    scene_id = db.Column(db.Integer, db.ForeignKey("scenes.id"), index=True)
     scene = db.relationship("Scene", back_populates="quotes")
     img = db.Column(db.String(500))
 
@@ -447,6 +462,57 @@ class Quote(db.Model):
 # -- END Primary data objects --
 
 
+# ----- BEGIN BACKGROUND TASK MODELS ----- #
+
+class BackgroundTask(db.Model):
+    """A unit of slow work, such as a MovieDB film import, run outside the request thread by the task queue."""
+
+    __tablename__ = "background_tasks"
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETE = "complete"
+    FAILED = "failed"
+
+    id = db.Column(db.Integer, autoincrement=True, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text, nullable=False, default="{}")
+    status = db.Column(db.String(10), nullable=False, default=QUEUED, index=True)
+    progress_done = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    owner = db.Column(db.String(100)) # The process running the task...
+    lease_expires_at = db.Column(db.DateTime()) # ...which renews its claim until then, or another process may take it over
+    created_at = db.Column(db.DateTime(), default=datetime.now)
+    updated_at = db.Column(db.DateTime(), default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return f"<BACKGROUNDTASK id={self.id} {self.name} {self.status}>"
+
+    def get_params(self):
+        return json.loads(self.params)
+
+    def get_result(self):
+        return json.loads(self.result) if self.result else None
+
+    def is_finished(self):
+        return self.status in (self.COMPLETE, self.FAILED)
+
+    def update_progress(self, done, total):
+        self.progress_done = done
+        self.progress_total = total
+        db.session.add(self)
+        db.session.commit()
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "status": self.status, "progress_done": self.progress_done,
+                "progress_total": self.progress_total, "error": self.error}
+
+# ----- END BACKGROUND TASK MODELS ----- #
+
+
 # ----- BEGIN USER AUTHENTICATION MODELS ----- #
 
 class User(UserMixin, db.Model):
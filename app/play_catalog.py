@@ -0,0 +1,97 @@
+"""In-process cache of the Play catalog, which practically never changes."""
+
+from .models import db, Play
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+import threading
+import time
+
+
+class PlayCatalog:
+    """Every row of the plays table, kept in memory and looked up by id, shortname or title. Loaded from the database
+    on first use and again after any write to plays is committed (or PLAY_CATALOG_TTL seconds pass, to pick up writes
+    made by other processes). Rows are stored as plain column values, never as instances shared between sessions."""
+
+    def __init__(self, app=None):
+        self.ttl = None
+        self.rows = None
+        self.loaded_at = 0
+        self.lock = threading.Lock()
+
+        event.listen(Play, "after_insert", self.on_play_write)
+        event.listen(Play, "after_update", self.on_play_write)
+        event.listen(Play, "after_delete", self.on_play_write)
+        event.listen(Session, "do_orm_execute", self.on_execute)
+        event.listen(Session, "after_commit", self.on_transaction_end)
+        event.listen(Session, "after_soft_rollback", self.on_transaction_end)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config["PLAY_CATALOG_TTL"]
+        self.invalidate()
+        app.extensions["play_catalog"] = self
+
+    def invalidate(self):
+        """Drop the cached rows; the next lookup reloads them."""
+
+        with self.lock:
+            self.rows = None
+
+    def load(self):
+        """Return the catalog as (rows by id, ids by shortname, ids by title), reading it from the database if needed."""
+
+        with self.lock:
+            if self.rows is None or time.monotonic() - self.loaded_at > self.ttl:
+                # Read on a connection of its own, so rows the current session hasn't committed are never cached
+                with db.engine.connect() as connection:
+                    rows = {row["id"]: dict(row) for row in connection.execute(select(Play.__table__)).mappings()}
+                self.rows = (rows,
+                             {row["shortname"]: id for id, row in rows.items()},
+                             {row["title"]: id for id, row in rows.items()})
+                self.loaded_at = time.monotonic()
+            return self.rows
+
+    def get(self, id=None, shortname=None, title=None):
+        """Given a play's id, shortname or title, return the Play in the current session, or None if there's no such play.
+        Costs no queries when the session hasn't loaded the play yet; its relationships are loaded when first used."""
+
+        rows, ids_by_shortname, ids_by_title = self.load()
+        if id is None:
+            id = ids_by_shortname.get(shortname) if shortname is not None else ids_by_title.get(title)
+        if id not in rows:
+            return None
+
+        play = db.session.identity_map.get(identity_key(Play, id))
+        if play is None: # don't overwrite changes the session has made to a play it already holds
+            play = Play(**rows[id])
+            make_transient_to_detached(play)
+            play = db.session.merge(play, load=False)
+        return play
+
+    def all(self):
+        """Return every Play in the current session, ordered by title."""
+
+        rows, ids_by_shortname, ids_by_title = self.load()
+        return [self.get(id=id) for title, id in sorted(ids_by_title.items())]
+
+    def on_play_write(self, mapper, connection, target):
+        self.invalidate()
+        Session.object_session(target).info["plays_changed"] = True
+
+    def on_execute(self, orm_execute_state):
+        """Notice plays written with Core insert/update/delete statements, which skip the mapper events."""
+
+        statement = orm_execute_state.statement
+        if orm_execute_state.is_select and getattr(statement, "element", None) is not None:
+            statement = statement.element # an INSERT ... RETURNING loaded as ORM objects with select().from_statement()
+        if getattr(statement, "is_dml", False) and statement.table.name == Play.__tablename__:
+            self.invalidate()
+            orm_execute_state.session.info["plays_changed"] = True
+
+    def on_transaction_end(self, session, *args):
+        # Other threads may have reloaded the catalog between the write and the commit (or rollback)
+        if session.info.pop("plays_changed", False):
+            self.invalidate()
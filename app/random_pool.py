@@ -0,0 +1,121 @@
+"""In-process pools of record ids, for picking random records without reading whole tables."""
+
+from .models import db, Film, Person
+from sqlalchemy import and_, event, select
+from sqlalchemy.orm import Session
+import random
+import threading
+import time
+
+
+def image_column(model):
+    """Given a model, return the column holding its image."""
+
+    if model is Film:
+        return Film.poster_path
+    if model is Person:
+        return Person.photo_path
+    return model.img
+
+
+class RandomPool:
+    """For each model asked for, the ids of every record and of the records with an image, kept in memory so a random
+    record costs one primary key lookup. A model's pool is reloaded (with one query) on first use after the model's
+    table is written to and the write committed, or after RANDOM_POOL_TTL seconds, to pick up writes made by other
+    processes."""
+
+    def __init__(self, app=None):
+        self.ttl = None
+        self.pools = {}
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+        event.listen(db.Model, "after_insert", self.on_record_write, propagate=True)
+        event.listen(db.Model, "after_delete", self.on_record_write, propagate=True)
+        event.listen(db.Model, "after_update", self.on_record_write, propagate=True)
+        event.listen(Session, "do_orm_execute", self.on_execute)
+        event.listen(Session, "after_commit", self.on_transaction_end)
+        event.listen(Session, "after_soft_rollback", self.on_transaction_end)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config["RANDOM_POOL_TTL"]
+        self.invalidate()
+        app.extensions["random_pool"] = self
+
+    def subscribe(self, callback):
+        """Call callback(table_names) whenever pools are dropped because the named tables (or, if None, any tables)
+        changed, so caches built from random records can be dropped too."""
+
+        self.subscribers.append(callback)
+
+    def invalidate(self, table_names=None):
+        """Drop the pools for the given table names, or every pool; they're reloaded when next used."""
+
+        with self.lock:
+            if table_names is None:
+                self.pools = {}
+            else:
+                self.pools = {model: pool for model, pool in self.pools.items() if model.__tablename__ not in table_names}
+        for callback in self.subscribers:
+            callback(table_names)
+
+    def load(self, model):
+        """Given a model, return its (ids with an image, all ids) pool, reading it from the database if needed."""
+
+        with self.lock:
+            pool = self.pools.get(model)
+            if pool is None or time.monotonic() - pool[2] > self.ttl:
+                column = image_column(model)
+                has_image = and_(column != None, column != "None")
+                with db.engine.connect() as connection: # never pool ids the current session hasn't committed
+                    rows = connection.execute(select(model.id, has_image)).all()
+                pool = (tuple(id for id, image in rows if image), tuple(id for id, image in rows), time.monotonic())
+                self.pools[model] = pool
+            return pool
+
+    def choice(self, model, prefer_image=True):
+        """Given a model, return a random record, from the records with an image if there are any and prefer_image
+        is set. Return None if there are no records."""
+
+        for attempt in range(2):
+            with_image, all_ids = self.load(model)[:2]
+            ids = (prefer_image and with_image) or all_ids
+            if not ids:
+                return None
+            record = db.session.get(model, random.choice(ids))
+            if record is not None:
+                return record
+            self.invalidate({model.__tablename__}) # deleted by another process; reload and try again
+        return None
+
+    def sample(self, model, count, prefer_image=True):
+        """Given a model, return up to count distinct random ids, from the records with an image if there are any
+        and prefer_image is set."""
+
+        with_image, all_ids = self.load(model)[:2]
+        ids = (prefer_image and with_image) or all_ids
+        return random.sample(ids, min(count, len(ids)))
+
+    def on_record_write(self, mapper, connection, target):
+        table_name = mapper.local_table.name
+        self.invalidate({table_name})
+        Session.object_session(target).info.setdefault("pooled_tables_changed", set()).add(table_name)
+
+    def on_execute(self, orm_execute_state):
+        """Notice records written with Core insert/update/delete statements, which skip the mapper events."""
+
+        statement = orm_execute_state.statement
+        if orm_execute_state.is_select and getattr(statement, "element", None) is not None:
+            statement = statement.element # an INSERT ... RETURNING loaded as ORM objects with select().from_statement()
+        if getattr(statement, "is_dml", False):
+            self.invalidate({statement.table.name})
+            orm_execute_state.session.info.setdefault("pooled_tables_changed", set()).add(statement.table.name)
+
+    def on_transaction_end(self, session, *args):
+        # Other threads may have reloaded a pool between the write and the commit (or rollback)
+        table_names = session.info.pop("pooled_tables_changed", None)
+        if table_names:
+            self.invalidate(table_names)
@@ -0,0 +1,86 @@
+"""Request-scoped memo of records found by the CRUD lookup helpers."""
+
+from .models import db
+from flask import g, has_request_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+
+class RequestMemo:
+    """Remembers, for the length of one request, the record each lookup (a model and its identifying column values)
+    returned, so asking again costs no queries. Kept on flask.g, dropped when the request ends or its session rolls
+    back, and never used outside a request. Counts hits and misses per request for debugging; in debug mode they're
+    sent back in an X-Lookup-Memo response header."""
+
+    def __init__(self, app=None):
+        event.listen(Session, "after_soft_rollback", self.on_rollback)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.teardown_request(self.teardown)
+        if app.debug:
+            app.after_request(self.add_stats_header)
+        app.extensions["request_memo"] = self
+
+    def records(self):
+        """Return this request's memo dictionary, creating it if needed."""
+
+        if "lookup_memo_stats" not in g:
+            g.lookup_memo_stats = {"hits": 0, "misses": 0}
+        if "lookup_memo" not in g:
+            g.lookup_memo = {}
+        return g.lookup_memo
+
+    def get(self, model, lookup):
+        """Given a model and the column values identifying a record, return the record remembered for them in this
+        request, or None. A remembered record that has been deleted, detached or changed to no longer match is forgotten."""
+
+        if not has_request_context():
+            return None
+
+        key = (model, tuple(sorted(lookup.items())))
+        record = self.records().get(key)
+        if record is not None:
+            state = inspect(record)
+            loaded = state.dict
+            if (state.session is not db.session() or state.deleted or state.was_deleted
+                    or any(column in loaded and loaded[column] != value for column, value in lookup.items())):
+                del g.lookup_memo[key]
+                record = None
+
+        g.lookup_memo_stats["hits" if record is not None else "misses"] += 1
+        return record
+
+    def set(self, model, lookup, record):
+        """Remember the record found (or created) for a model and its identifying column values, for this request."""
+
+        if has_request_context():
+            self.records()[(model, tuple(sorted(lookup.items())))] = record
+
+    def stats(self):
+        """Return this request's {"hits", "misses"} counts."""
+
+        if not has_request_context() or "lookup_memo_stats" not in g:
+            return {"hits": 0, "misses": 0}
+        return dict(g.lookup_memo_stats)
+
+    def clear(self):
+        """Forget every record remembered in this request."""
+
+        if has_request_context():
+            g.pop("lookup_memo", None)
+
+    def teardown(self, exception=None):
+        # g outlives the request when an app context was already pushed (as in tests and CLI commands)
+        g.pop("lookup_memo", None)
+        g.pop("lookup_memo_stats", None)
+
+    def on_rollback(self, session, previous_transaction):
+        # Records created in the rolled back transaction no longer exist
+        self.clear()
+
+    def add_stats_header(self, response):
+        stats = self.stats()
+        response.headers["X-Lookup-Memo"] = f"{stats['hits']} hits, {stats['misses']} misses"
+        return response
@@ -0,0 +1,157 @@
+"""Persistent on-disk cache for external API responses."""
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_SCHEMA_VERSION = 3
+PRIVATE_PARAMS = {"api_key"}
+EVICT_TO = 0.9 # Evict down to this fraction of RESPONSE_CACHE_MAX_BYTES, so a full cache doesn't evict on every write
+
+
+def cache_key(url):
+    """Given a request URL, return it with private parameters (API keys) removed and the query string sorted."""
+
+    parts = urlsplit(url)
+    query = sorted((key, value) for key, value in parse_qsl(parts.query) if key not in PRIVATE_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+class ResponseCache:
+    """A size-bounded, least-recently-used store of response bodies keyed by URL, kept in a SQLite file."""
+
+    def __init__(self, app=None):
+        self.path = None
+        self.max_bytes = None
+        self.ttls = {}
+        self._local = threading.local()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Open (or create) the cache file named by the app's RESPONSE_CACHE_* configuration."""
+
+        self.path = app.config["RESPONSE_CACHE_PATH"]
+        self.max_bytes = app.config["RESPONSE_CACHE_MAX_BYTES"]
+        self.ttls = app.config["RESPONSE_CACHE_TTLS"]
+        self._local = threading.local()
+
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.create_table()
+        app.extensions["response_cache"] = self
+
+    def connection(self):
+        """Return this thread's connection to the cache file; SQLite connections can't be shared between threads."""
+
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL") # let import worker threads read while another writes
+            self._local.connection = connection
+        return connection
+
+    def create_table(self):
+        """Create the responses table, discarding any cache written with an older schema."""
+
+        connection = self.connection()
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != CACHE_SCHEMA_VERSION:
+            connection.execute("DROP TABLE IF EXISTS responses")
+            connection.execute("DROP TABLE IF EXISTS cache_size")
+        connection.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                key TEXT PRIMARY KEY,
+                                body TEXT NOT NULL,
+                                size INTEGER NOT NULL,
+                                etag TEXT,
+                                last_modified TEXT,
+                                fetched_at REAL NOT NULL,
+                                accessed_at REAL NOT NULL)""")
+        connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at, key)")
+
+        # The total size of the cached bodies, kept up to date by triggers so set() can check it without a table scan
+        connection.execute("CREATE TABLE IF NOT EXISTS cache_size (total INTEGER NOT NULL)")
+        connection.execute("INSERT INTO cache_size (total) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM cache_size)")
+        connection.execute("""CREATE TRIGGER IF NOT EXISTS responses_insert_size AFTER INSERT ON responses
+                              BEGIN UPDATE cache_size SET total = total + new.size; END""")
+        connection.execute("""CREATE TRIGGER IF NOT EXISTS responses_update_size AFTER UPDATE OF size ON responses
+                              BEGIN UPDATE cache_size SET total = total + new.size - old.size; END""")
+        connection.execute("""CREATE TRIGGER IF NOT EXISTS responses_delete_size AFTER DELETE ON responses
+                              BEGIN UPDATE cache_size SET total = total - old.size; END""")
+        connection.execute(f"PRAGMA user_version = {CACHE_SCHEMA_VERSION}")
+
+    def get(self, url, endpoint):
+        """Given a URL and its endpoint name, return the cached body if it is younger than the endpoint's TTL, or None."""
+
+        key = cache_key(url)
+        ttl = self.ttls.get(endpoint, 0)
+        now = time.time()
+
+        connection = self.connection()
+        row = connection.execute("SELECT body, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+
+        body, fetched_at = row
+        if now - fetched_at > ttl:
+            return None
+
+        connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return body
+
+    def get_stale(self, url):
+        """Given a URL, return the cached (body, etag, last_modified) regardless of age, or None."""
+
+        return self.connection().execute("SELECT body, etag, last_modified FROM responses WHERE key = ?",
+                                         (cache_key(url),)).fetchone()
+
+    def set(self, url, body, etag=None, last_modified=None):
+        """Given a URL and response body, store the body with its validators and, if that takes the cache over its
+        size limit, evict least-recently-used entries."""
+
+        key = cache_key(url)
+        now = time.time()
+
+        connection = self.connection()
+        connection.execute("""INSERT INTO responses (key, body, size, etag, last_modified, fetched_at, accessed_at)
+                              VALUES (?, ?, ?, ?, ?, ?, ?)
+                              ON CONFLICT (key) DO UPDATE SET body = excluded.body, size = excluded.size,
+                                  etag = excluded.etag, last_modified = excluded.last_modified,
+                                  fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at""",
+                           (key, body, len(body.encode("utf-8")), etag, last_modified, now, now))
+        if self.size() > self.max_bytes:
+            self.evict()
+
+    def revalidate(self, url):
+        """Given a URL whose cached body the server confirmed is unchanged (304 Not Modified), make it fresh again."""
+
+        now = time.time()
+        self.connection().execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, cache_key(url)))
+
+    def size(self):
+        """Return the total size in bytes of the cached response bodies."""
+
+        return self.connection().execute("SELECT total FROM cache_size").fetchone()[0]
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fills no more than EVICT_TO of RESPONSE_CACHE_MAX_BYTES."""
+
+        self.connection().execute("""DELETE FROM responses WHERE key IN (
+                                        SELECT key FROM (
+                                            SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key DESC) AS running_size
+                                            FROM responses)
+                                        WHERE running_size > ?)""", (int(self.max_bytes * EVICT_TO),))
+
+    def purge(self, endpoint_prefix=None):
+        """Delete every cached response, or only those whose key starts with the given URL prefix; return the number deleted."""
+
+        connection = self.connection()
+        if endpoint_prefix:
+            cursor = connection.execute("DELETE FROM responses WHERE key LIKE ?", (endpoint_prefix + "%",))
+        else:
+            cursor = connection.execute("DELETE FROM responses")
+        connection.execute("VACUUM")
+        return cursor.rowcount
@@ -0,0 +1,85 @@
+"""Precomputed, rotating selection of featured records for the homepage."""
+
+from .models import Character, Film, Interpretation, Person, Play, Question, Scene
+from sqlalchemy import inspect
+import threading
+import time
+
+SHOWCASE_MODELS = {"plays": Play, "scenes": Scene, "characters": Character, "films": Film,
+                   "people": Person, "questions": Question, "interpretations": Interpretation}
+
+
+class ShowcaseItem:
+    """A read-only copy of a record's columns (and __tablename__), which templates can render like the record itself
+    without a database session."""
+
+    def __init__(self, record):
+        self.__tablename__ = record.__tablename__
+        for column in inspect(record).mapper.column_attrs:
+            setattr(self, column.key, getattr(record, column.key))
+
+    def __repr__(self):
+        return f"<SHOWCASE {self.__tablename__} id={self.id}>"
+
+
+class Showcase:
+    """Up to SHOWCASE_SIZE random records of each featured kind, picked with random_pool (preferring records with
+    an image) and copied into memory. Each kind shows one of its records at a time, moving on to the next every
+    SHOWCASE_ROTATE seconds. The records are picked again every SHOWCASE_REFRESH seconds, or on the next request
+    after one of their tables is written to, so in between the homepage needs no queries."""
+
+    def __init__(self, app=None):
+        self.size = None
+        self.rotate = None
+        self.refresh = None
+        self.items = None
+        self.built_at = 0
+        self.stale = True
+        self.build_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from . import random_pool
+
+        self.size = app.config["SHOWCASE_SIZE"]
+        self.rotate = app.config["SHOWCASE_ROTATE"]
+        self.refresh = app.config["SHOWCASE_REFRESH"]
+        self.items = None
+        self.stale = True
+        if self.on_tables_changed not in random_pool.subscribers:
+            random_pool.subscribe(self.on_tables_changed)
+        app.extensions["showcase"] = self
+
+    def build(self):
+        """Pick and copy a new set of featured records for every kind; runs one or two queries per kind."""
+
+        from . import random_pool
+
+        self.stale = False # writes from here on mark the new set stale again
+        items = {}
+        for kind, model in SHOWCASE_MODELS.items():
+            ids = random_pool.sample(model, self.size)
+            records = model.query.filter(model.id.in_(ids)).all() if ids else []
+            items[kind] = [ShowcaseItem(record) for record in records]
+        self.items = items
+        self.built_at = time.monotonic()
+
+    def current(self):
+        """Return a dictionary of the currently featured ShowcaseItem (or None) for each kind, rebuilding the
+        showcase first if it's stale. While one thread rebuilds, other threads keep serving the old showcase."""
+
+        if self.items is None or self.stale or time.monotonic() - self.built_at > self.refresh:
+            if self.build_lock.acquire(blocking=self.items is None):
+                try:
+                    self.build()
+                finally:
+                    self.build_lock.release()
+
+        slot = int(time.time() // self.rotate)
+        return {kind: records[(slot + offset) % len(records)] if records else None
+                for offset, (kind, records) in enumerate(self.items.items())}
+
+    def on_tables_changed(self, table_names):
+        if table_names is None or any(model.__tablename__ in table_names for model in SHOWCASE_MODELS.values()):
+            self.stale = True
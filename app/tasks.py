@@ -0,0 +1,137 @@
+"""In-process background task queue backed by the background_tasks table."""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_
+from .models import db, BackgroundTask
+import json
+import os
+import socket
+import threading
+import traceback
+
+
+def worker_name():
+    """Return a name for this process that is unique across the hosts sharing the database."""
+
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class TaskQueue:
+    """Runs registered task handlers on a thread pool. Task state lives in the database, so unfinished tasks
+    are picked up again when the app restarts. A running task is leased to the process running it, which renews the
+    lease while the handler runs; only a task whose lease has run out (its process died) is taken over by another."""
+
+    def __init__(self, app=None):
+        self.handlers = {}
+        self.executor = None
+        self.lease = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Start the worker pool and resume unfinished tasks before the app's first request."""
+
+        self.executor = ThreadPoolExecutor(max_workers=app.config["TASK_WORKERS"], thread_name_prefix="task")
+        self.lease = timedelta(seconds=app.config["TASK_LEASE"])
+        app.extensions["task_queue"] = self
+
+        @app.before_first_request
+        def resume_tasks():
+            self.resume_unfinished()
+
+    def handler(self, name):
+        """Register a function as the handler for tasks with the given name. The handler is called with the
+        BackgroundTask and the task's parameters, and returns a JSON-serializable result."""
+
+        def decorator(f):
+            self.handlers[name] = f
+            return f
+        return decorator
+
+    def enqueue(self, name, user=None, **params):
+        """Create a queued BackgroundTask and hand it to the worker pool; return the task."""
+
+        task = BackgroundTask(name=name, params=json.dumps(params), status=BackgroundTask.QUEUED,
+                              user_id=user.id if user and user.is_authenticated else None)
+        db.session.add(task)
+        db.session.commit()
+
+        self.submit(task.id)
+        return task
+
+    def submit(self, task_id):
+        """Run the task with the given ID on the worker pool."""
+
+        app = current_app._get_current_object()
+        self.executor.submit(self.run, app, task_id)
+
+    def resume_unfinished(self):
+        """Resubmit queued tasks, and running tasks whose lease has expired because the process running them died.
+        Tasks another live process is running are left alone, and run() claims each task for one process only."""
+
+        unfinished = db.session.query(BackgroundTask.id).filter(self.claimable()).all()
+        for (task_id,) in unfinished:
+            print(f"********* Resuming task {task_id} *********")
+            self.submit(task_id)
+
+    def claimable(self):
+        """Return the filter for tasks a worker may claim: queued ones, and running ones whose lease has expired."""
+
+        expired = or_(BackgroundTask.lease_expires_at == None, BackgroundTask.lease_expires_at < datetime.now())
+        return or_(BackgroundTask.status == BackgroundTask.QUEUED, (BackgroundTask.status == BackgroundTask.RUNNING) & expired)
+
+    def claim(self, task_id):
+        """Atomically mark a claimable task as running and leased to this process; return False if another worker
+        holds it, or it has finished."""
+
+        claimed = BackgroundTask.query.filter(BackgroundTask.id == task_id, self.claimable()) \
+                                      .update({"status": BackgroundTask.RUNNING, "owner": worker_name(),
+                                               "lease_expires_at": datetime.now() + self.lease}, synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
+
+    def renew_lease(self, app, task_id, stop):
+        """Extend this process's lease on a running task every third of TASK_LEASE, until stop is set."""
+
+        with app.app_context():
+            try:
+                while not stop.wait(self.lease.total_seconds() / 3):
+                    BackgroundTask.query.filter_by(id=task_id, owner=worker_name()) \
+                                        .update({"lease_expires_at": datetime.now() + self.lease}, synchronize_session=False)
+                    db.session.commit()
+            finally:
+                db.session.remove()
+
+    def run(self, app, task_id):
+        """Claim a task and run its handler inside an app context, renewing its lease while it runs and recording
+        its status and result."""
+
+        with app.app_context():
+            task = BackgroundTask.query.get(task_id) if self.claim(task_id) else None
+            if task is None: # claimed by another worker, or deleted after it was queued
+                db.session.remove()
+                return
+
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=self.renew_lease, args=(app, task_id, stop), daemon=True)
+            heartbeat.start()
+            try:
+                result = self.handlers[task.name](task, **task.get_params())
+
+                task.result = json.dumps(result)
+                task.status = BackgroundTask.COMPLETE
+                task.lease_expires_at = None
+                db.session.commit()
+            except Exception as e:
+                traceback.print_exc()
+                db.session.rollback()
+                task.status = BackgroundTask.FAILED
+                task.error = str(e)
+                task.lease_expires_at = None
+                db.session.commit()
+            finally:
+                stop.set()
+                heartbeat.join()
+                db.session.remove()
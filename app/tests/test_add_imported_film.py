@@ -0,0 +1,82 @@
+import unittest
+from app import create_app, db
+from app.main.crud import add_imported_film
+from app.models import Character, CharacterActor, Person, PersonJob, Play
+from datetime import datetime, timedelta
+from sqlalchemy import event
+
+def film_details(moviedb_id):
+    return {"film_moviedb_id": moviedb_id, "film_imdb_id": f"tt{moviedb_id}", "title": "Hamlet", "release_date": "1996-12-25",
+            "language": "en", "overview": "", "length": 242, "poster_path": None}
+
+def film_people(count, first=0):
+    people = {}
+    for i in range(first, first + count):
+        person = {"person_moviedb_id": 1000 + i, "person_imdb_id": f"nm{i}", "fname": f"First{i}", "lname": f"Last{i}",
+                  "birthday": "1960-01-01", "gender": 1, "photo_path": None, "parts_played": [], "jobs": []}
+        if i % 2:
+            person["jobs"].append("Director")
+        else:
+            person["parts_played"].append("Hamlet" if i % 4 else f"Gravedigger {i}")
+        people[person["person_moviedb_id"]] = person
+    return people
+
+class AddImportedFilmTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.play = Play(title="Hamlet", shortname="Ham")
+        db.session.add(self.play)
+        db.session.flush()
+        db.session.add(Character(name="Hamlet", play_id=self.play.id))
+        db.session.commit()
+
+        self.queries = 0
+        event.listen(db.engine, "before_cursor_execute", self.count_query)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self.count_query)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def count_query(self, *args):
+        self.queries += 1
+
+    def import_film(self, moviedb_id, people):
+        self.queries = 0
+        film = add_imported_film(self.play, film_details(moviedb_id), people, part_policy="create")
+        return film, self.queries
+
+    def test_query_count_is_constant(self):
+        self.import_film(1, film_people(4)) # creates the Director job
+        small_film, small_queries = self.import_film(2, film_people(4, first=100))
+        large_film, large_queries = self.import_film(3, film_people(40, first=200))
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(Person.query.count(), 48)
+        self.assertEqual(PersonJob.query.filter_by(film_id=large_film.id).count(), 40)
+        self.assertEqual(CharacterActor.query.filter_by(film_id=large_film.id).count(), 20)
+
+    def test_create_policy_adds_missing_characters(self):
+        self.import_film(1, film_people(8))
+        names = {character.name for character in Character.query.filter_by(play_id=self.play.id)}
+        self.assertEqual(names, {"Hamlet", "Gravedigger 0", "Gravedigger 4"})
+
+    def test_resave_refreshes_people_without_duplicates(self):
+        people = film_people(4)
+        film, _ = self.import_film(1, people)
+        people[1000]["lname"] = "Branagh"
+        self.import_film(1, people)
+        self.assertEqual(Person.query.filter_by(moviedb_id="1000").one().lname, "Branagh")
+        self.assertEqual(PersonJob.query.filter_by(film_id=film.id).count(), 4)
+
+    def test_resave_marks_unchanged_people_fresh(self):
+        people = film_people(4)
+        self.import_film(1, people)
+        Person.query.update({"last_updated": datetime.now() - timedelta(days=self.app.config["PERSON_STALE_DAYS"] + 1)})
+        db.session.commit()
+        self.import_film(1, people)
+        stale_before = datetime.now() - timedelta(days=1)
+        self.assertEqual(Person.query.filter(Person.last_updated < stale_before).count(), 0)
@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+from app import create_app, db
+from app.main.bulk_import import import_films, read_film_list
+from app.models import Character, Play
+import os
+import tempfile
+import time
+
+FILM_LIST = """# Hamlets
+10264 Ham
+https://www.themoviedb.org/movie/10549-hamlet, Ham
+
+10264
+https://www.imdb.com/title/tt0116477/ Ham
+Ham 10549
+10549 Ham extra
+"""
+
+class ReadFilmListTestCase(unittest.TestCase):
+    def setUp(self):
+        film_list, self.path = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(film_list, "w") as film_list_file:
+            film_list_file.write(FILM_LIST)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_bad_lines_are_reported_and_skipped(self):
+        films, bad_lines = read_film_list(self.path)
+        self.assertEqual(films, [("10264", "Ham"), ("10549", "Ham")])
+        self.assertEqual([(number, line) for number, line, error in bad_lines],
+                         [(5, "10264"), (6, "https://www.imdb.com/title/tt0116477/ Ham"), (7, "Ham 10549"),
+                          (8, "10549 Ham extra")])
+
+
+class ImportFilmsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        play = Play(title="Hamlet", shortname="Ham")
+        db.session.add(play)
+        db.session.flush()
+        db.session.add(Character(name="Hamlet", play_id=play.id)) # seeded already
+        db.session.add(Play(title="Macbeth", shortname="Mac")) # not seeded yet
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_films_are_written_as_their_fetches_finish(self):
+        def fetch_film(app, moviedb_id, play_id):
+            time.sleep(0.5 if moviedb_id == "1" else 0)
+            return {"details": {"title": f"Film {moviedb_id}"}, "people": {}, "fetch_time": 0}
+
+        def add_imported_film(play, details, people, part_policy):
+            return mock.Mock(title=details["title"])
+
+        with mock.patch("app.main.bulk_import.fetch_film", side_effect=fetch_film), \
+             mock.patch("app.main.bulk_import.add_imported_film", side_effect=add_imported_film):
+            report = import_films([("1", "Ham"), ("2", "Ham")], workers=2)
+        self.assertEqual([row["title"] for row in report], ["Film 2", "Film 1"])
+
+    def test_films_of_a_play_that_fails_to_seed_are_reported_and_the_rest_imported(self):
+        def fetch_film(app, moviedb_id, play_id):
+            return {"details": {"title": f"Film {moviedb_id}"}, "people": {}, "fetch_time": 0}
+
+        def add_imported_film(play, details, people, part_policy):
+            return mock.Mock(title=details["title"])
+
+        with mock.patch("app.main.bulk_import.seed_play", side_effect=ConnectionError("Folger is down")) as seed_play, \
+             mock.patch("app.main.bulk_import.fetch_film", side_effect=fetch_film), \
+             mock.patch("app.main.bulk_import.add_imported_film", side_effect=add_imported_film):
+            report = import_films([("1", "Mac"), ("2", "Ham"), ("3", "Mac")], workers=2)
+        self.assertEqual(seed_play.call_count, 1)
+        rows = {row["moviedb_id"]: row for row in report}
+        self.assertEqual(rows["2"]["title"], "Film 2")
+        for moviedb_id in ("1", "3"):
+            self.assertEqual(rows[moviedb_id]["error"], "Couldn't seed play: ConnectionError: Folger is down")
@@ -0,0 +1,87 @@
+import unittest
+from unittest import mock
+from app import create_app, db
+from app.main import crud
+from app.main.crud import add_scene, batch, get_character, update_scene, upsert_scene_descriptions
+from app.models import Character, Play, Scene
+import threading
+
+class CrudBatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.play = Play(title="Hamlet", shortname="Ham")
+        db.session.add(self.play)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_batch_commits_once(self):
+        with batch():
+            scene = add_scene(act=1, scene=1, play=self.play, title="The Ramparts")
+            self.assertIsNotNone(scene.id) # flushed, so the new record already has its id
+            update_scene(scene=scene, description="The Ghost appears.")
+            with batch(): # nested batches join the outer transaction
+                get_character(name="Hamlet", play=self.play)
+        db.session.remove()
+        self.assertEqual(Scene.query.one().description, "The Ghost appears.")
+        self.assertEqual(Character.query.count(), 1)
+
+    def test_batch_rolls_back_on_error(self):
+        with self.assertRaises(ValueError):
+            with batch():
+                add_scene(act=1, scene=1, play=self.play, title="The Ramparts")
+                get_character(name="Hamlet", play=self.play)
+                raise ValueError("form error")
+        db.session.remove()
+        self.assertEqual(Scene.query.count(), 0)
+        self.assertEqual(Character.query.count(), 0)
+        self.assertEqual(db.session.info.get("batch_depth", 0), 0)
+
+    def test_racing_get_or_create_makes_one_record(self):
+        both_missed = threading.Barrier(2, timeout=10)
+        insert = crud.postgresql.insert
+
+        def insert_after_both_missed(model):
+            both_missed.wait() # both workers have run their SELECT and found nothing
+            return insert(model)
+
+        play_id = self.play.id
+
+        def get_hamlet(results):
+            with self.app.app_context():
+                try:
+                    results.append(get_character(name="Hamlet", play=Play.query.get(play_id)).id)
+                finally:
+                    db.session.remove()
+
+        results = []
+        with mock.patch("app.main.crud.postgresql.insert", side_effect=insert_after_both_missed):
+            workers = [threading.Thread(target=get_hamlet, args=(results,)) for i in range(2)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(Character.query.count(), 1)
+
+    def test_upserting_overlapping_scene_descriptions_updates_without_duplicates(self):
+        upsert_scene_descriptions(self.play, {(1, 1): "On the ramparts.", (1, 2): "Claudius holds court."})
+        scenes = upsert_scene_descriptions(self.play, {(1, 2): "Claudius speaks to the court.", (1, 3): "Laertes leaves."})
+        self.assertEqual([(scene.act, scene.scene, scene.description) for scene in scenes],
+                         [(1, 1, "On the ramparts."), (1, 2, "Claudius speaks to the court."), (1, 3, "Laertes leaves.")])
+
+        db.session.remove()
+        self.assertEqual(Scene.query.count(), 3)
+        ids = {(scene.act, scene.scene): scene.id for scene in Scene.query}
+        upsert_scene_descriptions(Play.query.get(self.play.id), {(1, 2): "Claudius and Gertrude hold court."})
+        db.session.remove()
+        self.assertEqual({(scene.act, scene.scene): scene.id for scene in Scene.query}, ids) # updated in place
+        self.assertEqual(Scene.query.filter_by(act=1, scene=2).one().description, "Claudius and Gertrude hold court.")
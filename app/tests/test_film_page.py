@@ -0,0 +1,120 @@
+import unittest
+from app import create_app, db, login_manager
+from app.main.crud import get_film_summaries
+from app.models import (Character, CharacterActor, Film, Interpretation, Job, Person, PersonJob, Play, Question,
+                        User)
+from datetime import date
+from sqlalchemy import event, insert
+
+class FilmPageTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app.config["SECRET_KEY"] = self.app.config["SECRET_KEY"] or "testing" # for the films list's form
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        play = Play(title="Hamlet", shortname="Ham")
+        db.session.add(play)
+        db.session.flush()
+        self.play_id = play.id
+        db.session.execute(insert(Job), [{"title": "Actor"}, {"title": "Director"}, {"title": "Producer"}])
+        db.session.execute(insert(Character), [{"name": name, "play_id": play.id, "word_count": 100 - i}
+                                               for i, name in enumerate(["Ophelia", "Gertrude", "Hamlet"] + [f"Lord {i}" for i in range(97)])])
+        Character.query.filter_by(name="Hamlet").update({"word_count": 1500})
+        db.session.commit()
+        login_manager.user_loader(lambda user_id: User.query.get(user_id)) # registered by motiveandcue.py outside of tests
+        self.client = self.app.test_client()
+
+        self.queries = 0
+        event.listen(db.engine, "before_cursor_execute", self.count_query)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self.count_query)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def count_query(self, *args):
+        self.queries += 1
+
+    def add_film(self, size):
+        """Given a cast size, add a film with that many actors, a director, a producer and an interpretation for
+        each tenth actor, and return its id."""
+
+        jobs = {job.title: job.id for job in Job.query.all()}
+        characters = [character.id for character in Character.query.order_by(Character.id).limit(size)]
+        number = Film.query.count()
+        film = Film(moviedb_id=f"film{number}", title=f"Hamlet {size}", release_date=date(2000, 1, 1), play_id=self.play_id)
+        db.session.add(film)
+        db.session.flush()
+        people = db.session.execute(insert(Person).returning(Person.id),
+                                    [{"moviedb_id": f"{number}-{i}", "fname": f"Film {number}", "lname": str(i),
+                                      "birthday": date(1970 + i % 30, 1, 1)} for i in range(size + 2)]).scalars().all()
+        db.session.execute(insert(PersonJob), [{"person_id": person_id, "film_id": film.id, "job_id": jobs["Actor"]}
+                                               for person_id in people[:size]])
+        db.session.execute(insert(PersonJob), [{"person_id": people[size], "film_id": film.id, "job_id": jobs["Director"]},
+                                               {"person_id": people[size + 1], "film_id": film.id, "job_id": jobs["Producer"]}])
+        db.session.execute(insert(CharacterActor), [{"person_id": person_id, "character_id": character_id, "film_id": film.id}
+                                                    for person_id, character_id in zip(people, characters)])
+        for i in range(size // 10):
+            question = Question(play_id=self.play_id, title=f"Question {size}-{i}")
+            db.session.add(question)
+            db.session.flush()
+            db.session.add(Interpretation(play_id=self.play_id, film_id=film.id, question_id=question.id,
+                                          title=f"Interpretation {size}-{i}"))
+        db.session.commit()
+        return film.id
+
+    def queries_for_page(self, film_id):
+        """Given a film's id, return the film page and the number of queries it took."""
+
+        return self.queries_for(f"/films/{film_id}/")
+
+    def queries_for(self, url):
+        """Given a url, return its page and the number of queries it took."""
+
+        db.session.remove()
+        self.queries = 0
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, self.queries
+
+    def test_query_count_does_not_grow_with_the_cast(self):
+        small_film = self.add_film(10)
+        large_film = self.add_film(100)
+        self.queries_for_page(small_film) # loads the play catalog
+
+        response, small_queries = self.queries_for_page(small_film)
+        response, large_queries = self.queries_for_page(large_film)
+        self.assertEqual(large_queries, small_queries)
+        self.assertLessEqual(large_queries, 4)
+        self.assertIn(b"Lord 96", response.data)
+        self.assertIn(b"Film 1 100</a>", response.data) # the director
+        self.assertIn(b"Interpretation 100-9", response.data)
+        self.assertIn(b"Question 100-9", response.data)
+
+    def test_list_query_count_does_not_grow_with_the_films(self):
+        self.add_film(10)
+        self.queries_for("/films/") # loads the play catalog
+        response, one_film_queries = self.queries_for("/films/")
+
+        for size in range(20, 100, 20):
+            self.add_film(size)
+        response, five_film_queries = self.queries_for("/films/")
+        self.assertEqual(five_film_queries, one_film_queries)
+        self.assertLessEqual(five_film_queries, 4)
+        for number in range(5):
+            self.assertIn(f"Film {number} 2</a>".encode(), response.data) # Hamlet, the top word count character
+            director = 10 if number == 0 else number * 20 # the first person after the cast
+            self.assertIn(f"Film {number} {director}</a>".encode(), response.data)
+
+    def test_summaries_pick_the_actor_of_the_longest_part_as_lead(self):
+        film_id = self.add_film(3) # the third actor plays Hamlet, the part with the most words
+        uncast = Film(moviedb_id="uncast", title="Hamlet 0", release_date=date(2000, 1, 1), play_id=self.play_id)
+        db.session.add(uncast)
+        db.session.commit()
+
+        summaries = get_film_summaries([Film.query.get(film_id), uncast])
+        self.assertEqual(summaries[film_id]["lead"].lname, "2")
+        self.assertEqual([director.lname for director in summaries[film_id]["directors"]], ["3"])
+        self.assertEqual(summaries[uncast.id], {"lead": None, "directors": []})
@@ -0,0 +1,33 @@
+import unittest
+from unittest import mock
+from app import create_app, db, login_manager, task_queue
+from app.models import BackgroundTask, Play, User
+import json
+
+class FilmVerificationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app.config["SECRET_KEY"] = self.app.config["SECRET_KEY"] or "testing" # for flashed messages
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add(Play(title="Macbeth", shortname="Mac")) # not seeded yet
+        db.session.commit()
+        login_manager.user_loader(lambda user_id: User.query.get(user_id)) # registered by motiveandcue.py outside of tests
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_film_of_unseeded_play_queues_seeding_instead_of_streaming(self):
+        with mock.patch.object(task_queue, "submit"), \
+             mock.patch("app.main.routes.get_moviedb_film_with_credits") as get_moviedb_film_with_credits:
+            response = self.client.get("/process-film/", query_string={
+                "play_titles": "Mac", "film-url": "https://www.themoviedb.org/movie/10549-macbeth", "stream": "1"})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.location.endswith("/films/add"))
+        get_moviedb_film_with_credits.assert_not_called()
+        task = BackgroundTask.query.one()
+        self.assertEqual((task.name, json.loads(task.params)), ("seed_plays", {"shortnames": ["Mac"]}))
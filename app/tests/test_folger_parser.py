@@ -0,0 +1,124 @@
+import unittest
+from unittest import mock
+from app import create_app, response_cache
+from app.main.folger_benchmark import EXTRACTORS
+from app.main.folger_parser import extract_folger_synopses, get_folger_page
+from app.http_client import CircuitOpenError
+import requests
+
+CHARACTERS_PAGE = """<html><head><meta charset="utf-8"></head><body>
+<table>
+<tr><td style="width: 60px;">1507</td><td><a href="Ham_Hamlet.html">Hamlet</a></td></tr>
+<tr><td style="width: 60px;">312</td><td><a href="Ham_FirstPlayer.html">FirstPlayer</a></td></tr>
+<tr><td style="width: 60px;">41</td><td><a href="Ham_ATTENDANTS.html">ATTENDANTS</a></td></tr>
+</table>
+</body></html>"""
+
+SCENES_PAGE = """<html><body>
+<p><a href="scene1.html">Act 1, scene 1</a></p>
+<p>Prologue&nbsp;&amp; induction</p>
+<p><a href="scene2.html">Act 1, scene 2</a></p>
+</body></html>"""
+
+SYNOPSIS_PAGE = """<html><body>
+<h2>Synopsis &mdash; Hamlet</h2>
+<p>Act 1, Scene 1: On the castle&rsquo;s ramparts, Horatio &amp; the guards ¶see the Ghost.</p>
+<p>Act 1, Scene 2: Claudius speaks &lt;to the court&gt;.</p>
+</body></html>"""
+
+# Folger markup variations: quoting, stray whitespace, uppercase tags, <br> in a synopsis and unclosed <p>s
+QUIRKY_CHARACTERS_PAGE = """<table>
+<tr><td style='width: 60px;' >1507</td><td><a href='Ham_Hamlet.html' >Hamlet</a></td></tr>
+<TR><TD STYLE="width: 60px;">312</TD><TD><A HREF=Ham_FirstPlayer.html>FirstPlayer</A></TD></TR>
+</table>"""
+
+QUIRKY_SCENES_PAGE = """<P><a href="scene1.html">Act 1, scene 1</a></P>
+<p><a href="scene2.html">Act 1, scene 2</a>
+<p><a href="scene3.html">Act 1, scene 3</a></p >"""
+
+QUIRKY_SYNOPSIS_PAGE = """<P>Act 1, Scene 1: On the ramparts,<br>the guards see the Ghost.</P>
+<p>Act 1, Scene 2: Laertes &amp; Ophelia&#8217;s farewell &copy</p>"""
+
+# BeautifulSoup nests unclosed <p>s, so its patterns miss all but the last synopsis here
+UNCLOSED_SYNOPSIS_PAGE = """<p>Act 1, Scene 1: On the ramparts.
+<p>Act 1, Scene 2: Claudius speaks to the court.
+<p>Act 1, Scene 3: Polonius &amp; Laertes.</p>"""
+
+class FolgerParserTestCase(unittest.TestCase):
+    def assertMatchesSoup(self, kind, page):
+        soup_extractor, fast_extractor = EXTRACTORS[kind]
+        fast_output = fast_extractor(page)
+        self.assertTrue(fast_output)
+        self.assertEqual(fast_output, soup_extractor(page))
+
+    def test_characters_match_soup(self):
+        self.assertMatchesSoup("characters", CHARACTERS_PAGE)
+
+    def test_scenes_match_soup(self):
+        self.assertMatchesSoup("scenes", SCENES_PAGE)
+
+    def test_synopses_match_soup(self):
+        self.assertMatchesSoup("synopses", SYNOPSIS_PAGE)
+
+    def test_quirky_characters_match_soup(self):
+        self.assertMatchesSoup("characters", QUIRKY_CHARACTERS_PAGE)
+
+    def test_quirky_scenes_match_soup(self):
+        self.assertMatchesSoup("scenes", QUIRKY_SCENES_PAGE)
+
+    def test_quirky_synopses_match_soup(self):
+        self.assertMatchesSoup("synopses", QUIRKY_SYNOPSIS_PAGE)
+
+    def test_unclosed_synopses_are_extracted(self):
+        self.assertEqual(extract_folger_synopses(UNCLOSED_SYNOPSIS_PAGE),
+                         [("1", "1", "On the ramparts."), ("1", "2", "Claudius speaks to the court."),
+                          ("1", "3", "Polonius &amp; Laertes.")])
+
+
+class FolgerPageCacheTestCase(unittest.TestCase):
+    URL = "https://www.folgerdigitaltexts.org/Ham/charText/"
+
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        response_cache.purge()
+        response_cache.set(self.URL, "old page", etag='"v1"', last_modified="Wed, 01 Jan 2020 00:00:00 GMT")
+        response_cache.connection().execute("UPDATE responses SET fetched_at = 0") # stale
+
+    def tearDown(self):
+        response_cache.purge()
+        self.app_context.pop()
+
+    def fetch(self, **response):
+        with mock.patch("app.main.folger_parser.http_client.get", **response) as get:
+            page = get_folger_page(self.URL)
+        return page, get
+
+    def test_validators_are_sent_and_304_revalidates_cached_copy(self):
+        page, get = self.fetch(return_value=mock.Mock(status_code=304, ok=False))
+        self.assertEqual(page, "old page")
+        self.assertEqual(get.call_args.kwargs["headers"],
+                         {"If-None-Match": '"v1"', "If-Modified-Since": "Wed, 01 Jan 2020 00:00:00 GMT"})
+        self.assertEqual(response_cache.get(self.URL, "folger"), "old page") # fresh again
+
+        page, get = self.fetch()
+        self.assertEqual(page, "old page")
+        get.assert_not_called()
+
+    def test_changed_page_replaces_cached_copy(self):
+        response = mock.Mock(status_code=200, ok=True, content=b"<p>new page</p>", headers={"ETag": '"v2"'})
+        page, get = self.fetch(return_value=response)
+        self.assertEqual(page, "<p>new page</p>")
+        self.assertEqual(response_cache.get_stale(self.URL), ("<p>new page</p>", '"v2"', None))
+
+    def test_stale_copy_is_returned_when_fetch_fails(self):
+        for error in (requests.ConnectionError("down"), CircuitOpenError("open")):
+            page, get = self.fetch(side_effect=error)
+            self.assertEqual(page, "old page")
+        self.assertIsNone(response_cache.get(self.URL, "folger")) # still stale, so retried next time
+
+    def test_fetch_error_is_raised_without_a_cached_copy(self):
+        response_cache.purge()
+        with self.assertRaises(requests.ConnectionError):
+            self.fetch(side_effect=requests.ConnectionError("down"))
@@ -0,0 +1,51 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from app import create_app, db
+from app.main.seed import FOLGER_SNAPSHOT_VERSION, load_folger_snapshot
+from app.models import Character, Play, Scene
+
+SNAPSHOT = {
+    "version": FOLGER_SNAPSHOT_VERSION,
+    "source": "folgerdigitaltexts.org",
+    "created": "2021-08-01",
+    "plays": [
+        {"shortname": "Ham", "title": "Hamlet",
+         "characters": [["Hamlet", 11563], ["Claudius", 4204]],
+         "scenes": [[1, 1, "On the castle ramparts, the Ghost appears."], [1, 2, "Claudius holds court."]]},
+    ],
+}
+
+class FolgerSnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        snapshot_file, self.path = tempfile.mkstemp(suffix=".json.gz")
+        os.close(snapshot_file)
+        with gzip.open(self.path, "wt", encoding="utf-8") as snapshot_file:
+            json.dump(SNAPSHOT, snapshot_file)
+
+    def tearDown(self):
+        os.remove(self.path)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_load_snapshot(self):
+        report = load_folger_snapshot(self.path)
+        self.assertEqual((report["plays"], report["characters"], report["scenes"]), (1, 2, 2))
+        play = Play.query.filter(Play.shortname == "Ham").one()
+        self.assertEqual(Character.query.filter(Character.play_id == play.id).count(), 2)
+        scene = Scene.query.filter((Scene.play_id == play.id) & (Scene.act == 1) & (Scene.scene == 2)).one()
+        self.assertEqual(scene.description, "Claudius holds court.")
+
+    def test_load_snapshot_twice_adds_nothing(self):
+        load_folger_snapshot(self.path)
+        report = load_folger_snapshot(self.path)
+        self.assertEqual((report["characters"], report["scenes"]), (0, 0))
+        self.assertEqual(Scene.query.count(), 2)
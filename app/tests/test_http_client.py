@@ -0,0 +1,145 @@
+import unittest
+from unittest import mock
+from config import config
+from flask import Flask
+from app.http_client import CircuitBreaker, CircuitOpenError, HTTPClient, TokenBucket
+from app.http_fixtures import MissingFixtureError, RecordingAdapter, ReplayAdapter, fixture_path
+import json
+import requests
+import tempfile
+import threading
+
+def fake_response(status_code, headers=None, body=b""):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = body
+    return response
+
+class HTTPClientTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        app.config.from_object(config["testing"])
+        app.config["HTTP_BACKOFF_FACTOR"] = 0
+        app.config["HTTP_BREAKER_THRESHOLD"] = 3
+        self.client = HTTPClient(app)
+
+    def test_retries_after_rate_limit(self):
+        responses = [fake_response(429, {"Retry-After": "0"}), fake_response(200)]
+        with mock.patch.object(self.client.session, "get", side_effect=responses) as get:
+            response = self.client.get("https://api.themoviedb.org/3/person/1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get.call_count, 2)
+
+    def test_does_not_retry_client_errors(self):
+        with mock.patch.object(self.client.session, "get", return_value=fake_response(404)) as get:
+            response = self.client.get("https://api.themoviedb.org/3/person/1")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(get.call_count, 1)
+
+    def test_gives_up_after_max_attempts(self):
+        self.client.max_attempts = 2 # below the breaker threshold
+        with mock.patch.object(self.client.session, "get", return_value=fake_response(503)) as get:
+            response = self.client.get("https://api.themoviedb.org/3/person/1")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(get.call_count, 2)
+
+    def test_gives_up_on_connection_errors_after_max_attempts(self):
+        self.client.max_attempts = 2
+        with mock.patch.object(self.client.session, "get", side_effect=requests.ConnectionError) as get:
+            with self.assertRaises(requests.ConnectionError):
+                self.client.get("https://api.themoviedb.org/3/person/1")
+        self.assertEqual(get.call_count, 2)
+
+    def test_circuit_opens_after_repeated_failures(self):
+        with mock.patch.object(self.client.session, "get", return_value=fake_response(503)) as get:
+            with self.assertRaises(CircuitOpenError):
+                self.client.get("https://api.themoviedb.org/3/person/1")
+            with self.assertRaises(CircuitOpenError):
+                self.client.get("https://api.themoviedb.org/3/person/2")
+        self.assertEqual(get.call_count, 3)
+
+    def test_retry_after_is_capped_at_backoff_max(self):
+        self.client.backoff_max = 5
+        responses = [fake_response(503, {"Retry-After": "86400"}), fake_response(200)]
+        with mock.patch.object(self.client.session, "get", side_effect=responses), \
+             mock.patch("app.http_client.time.sleep") as sleep:
+            response = self.client.get("https://api.themoviedb.org/3/person/1")
+        self.assertEqual(response.status_code, 200)
+        sleep.assert_called_once_with(5)
+
+    def test_half_open_circuit_lets_one_trial_through(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+        with mock.patch("app.http_client.time.monotonic", return_value=1000):
+            breaker.record_failure()
+        with mock.patch("app.http_client.time.monotonic", return_value=1061):
+            admitted = []
+            def request():
+                try:
+                    breaker.before_request("api.themoviedb.org")
+                    admitted.append(True)
+                except CircuitOpenError:
+                    pass
+            callers = [threading.Thread(target=request) for i in range(8)]
+            for caller in callers:
+                caller.start()
+            for caller in callers:
+                caller.join()
+            self.assertEqual(len(admitted), 1)
+
+            breaker.record_failure() # the trial failed, so the circuit opens again
+            with self.assertRaises(CircuitOpenError):
+                breaker.before_request("api.themoviedb.org")
+        with mock.patch("app.http_client.time.monotonic", return_value=1122):
+            breaker.before_request("api.themoviedb.org") # the next trial
+            breaker.record_success()
+            breaker.before_request("api.themoviedb.org") # closed: everyone is let through
+            breaker.before_request("api.themoviedb.org")
+
+    def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        with mock.patch("app.http_client.time.sleep") as sleep:
+            bucket.acquire()
+            sleep.side_effect = lambda seconds: setattr(bucket, "tokens", 1)
+            bucket.acquire()
+        self.assertTrue(sleep.called)
+
+class RecordingAdapterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.fixture_dir = tempfile.TemporaryDirectory()
+        self.adapter = RecordingAdapter(self.fixture_dir.name, skip_statuses=(429,))
+        self.url = "https://folgerdigitaltexts.org/Ham/charText/"
+
+    def tearDown(self):
+        self.fixture_dir.cleanup()
+
+    def send(self, response):
+        request = requests.Request("GET", self.url).prepare()
+        with mock.patch("requests.adapters.HTTPAdapter.send", return_value=response):
+            self.adapter.send(request)
+
+    def recorded(self):
+        with open(fixture_path(self.fixture_dir.name, self.url)) as fixture_file:
+            return json.load(fixture_file)
+
+    def test_not_modified_keeps_recorded_page(self):
+        self.send(fake_response(200, body=b"<html>Hamlet</html>"))
+        self.send(fake_response(304))
+        self.send(fake_response(503))
+        self.send(fake_response(404))
+        self.assertEqual(self.recorded()["status_code"], 200)
+        self.assertEqual(self.recorded()["body"], "<html>Hamlet</html>")
+
+    def test_records_final_errors(self):
+        self.send(fake_response(429))
+        self.send(fake_response(404, body=b"missing"))
+        self.assertEqual(self.recorded()["status_code"], 404)
+
+    def test_replay_raises_for_missing_fixture(self):
+        self.send(fake_response(200, body=b"<html>Hamlet</html>"))
+        replay = ReplayAdapter(self.fixture_dir.name)
+        self.assertEqual(replay.send(requests.Request("GET", self.url).prepare()).text, "<html>Hamlet</html>")
+
+        missing_url = "https://folgerdigitaltexts.org/Mac/charText/"
+        with self.assertRaisesRegex(MissingFixtureError, fixture_path(self.fixture_dir.name, missing_url)):
+            replay.send(requests.Request("GET", missing_url).prepare())
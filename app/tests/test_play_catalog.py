@@ -0,0 +1,57 @@
+import unittest
+from app import create_app, db
+from app.main.crud import get_all_plays, get_play_by_id, get_play_by_shortname, get_play_by_title
+from app.models import Play
+from sqlalchemy import event, insert
+
+class PlayCatalogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add(Play(title="Hamlet", shortname="Ham"))
+        db.session.commit()
+        db.session.remove()
+
+        self.queries = 0
+        event.listen(db.engine, "before_cursor_execute", self.count_query)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self.count_query)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def count_query(self, *args):
+        self.queries += 1
+
+    def test_lookups_are_cached(self):
+        play = get_play_by_shortname("Ham")
+        self.queries = 0
+        for _ in range(10):
+            self.assertIs(get_play_by_shortname("Ham"), play)
+            self.assertIs(get_play_by_title("Hamlet"), play)
+            self.assertIs(get_play_by_id(play.id), play)
+        self.assertEqual(self.queries, 0)
+        self.assertIn(play, db.session)
+
+    def test_writes_invalidate_the_catalog(self):
+        play = get_play_by_shortname("Ham")
+        play_id = play.id
+        play.title = "The Tragedy of Hamlet"
+        db.session.commit()
+        db.session.remove()
+        self.assertEqual(get_play_by_id(play_id).title, "The Tragedy of Hamlet")
+
+        db.session.execute(insert(Play).values(title="Zed", shortname="Zed"))
+        db.session.commit()
+        self.assertEqual(get_play_by_shortname("Zed").title, "Zed")
+        self.assertEqual([play.shortname for play in get_all_plays()], ["Ham", "Zed"])
+
+    def test_uncommitted_changes_are_kept(self):
+        play = get_play_by_shortname("Ham")
+        play.img = "hamlet.jpg"
+        self.assertEqual(get_play_by_shortname("Ham").img, "hamlet.jpg")
+        db.session.rollback()
+        self.assertIsNone(get_play_by_shortname("Ham").img)
@@ -0,0 +1,92 @@
+import unittest
+from app import create_app, db
+from app.models import (Character, CharacterActor, CharacterInterpretation, CharacterQuestion, Film, Interpretation,
+                        Job, Person, PersonJob, Play, Question, Quote, Scene, SceneInterpretation, SceneQuestion)
+from sqlalchemy import insert
+
+class QueryPlansTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        # A synthetic dataset: 50 plays, each with 50 characters, 20 scenes, 100 questions and 10 films with 50 cast and
+        # crew members; big enough that a lookup without a usable index is planned as a full table scan
+        plays, films, people, questions = 50, 500, 5000, 5000
+        db.session.execute(insert(Play), [{"title": f"Play {i}", "shortname": f"P{i}"} for i in range(plays)])
+        db.session.execute(insert(Job), [{"title": "Actor"}, {"title": "Director"}])
+        db.session.execute(insert(Person), [{"moviedb_id": str(i), "fname": "First", "lname": str(i)}
+                                            for i in range(people)])
+        db.session.execute(insert(Film), [{"moviedb_id": str(i), "title": f"Film {i}", "release_date": "1990-01-01",
+                                           "play_id": i % plays + 1}
+                                          for i in range(films)])
+        db.session.execute(insert(Character), [{"name": f"Character {i}", "play_id": i % plays + 1}
+                                               for i in range(plays * 50)])
+        db.session.execute(insert(Scene), [{"play_id": i % plays + 1, "act": i // plays // 5 + 1, "scene": i // plays % 5 + 1}
+                                           for i in range(plays * 20)])
+        db.session.execute(insert(Question), [{"play_id": i % plays + 1, "title": f"Question {i}"} for i in range(questions)])
+        db.session.execute(insert(Interpretation), [{"play_id": i % plays + 1, "film_id": i % films + 1,
+                                                     "question_id": i % questions + 1, "title": f"Interpretation {i}"}
+                                                    for i in range(questions * 2)])
+        db.session.execute(insert(Quote), [{"play_id": i % plays + 1, "scene_id": i % (plays * 20) + 1}
+                                           for i in range(plays * 200)])
+        db.session.execute(insert(PersonJob), [{"person_id": (film * 50 + i) % people + 1, "film_id": film + 1,
+                                                "job_id": 2 if i == 0 else 1} for film in range(films) for i in range(50)])
+        db.session.execute(insert(CharacterActor), [{"person_id": (film * 50 + i) % people + 1, "film_id": film + 1,
+                                                     "character_id": film % plays + 1 + i * plays}
+                                                    for film in range(films) for i in range(1, 50)])
+        db.session.execute(insert(CharacterInterpretation), [{"character_id": i % (plays * 50) + 1, "interpretation_id": i + 1}
+                                                             for i in range(questions * 2)])
+        db.session.execute(insert(SceneInterpretation), [{"scene_id": i % (plays * 20) + 1, "interpretation_id": i + 1}
+                                                         for i in range(questions * 2)])
+        db.session.execute(insert(CharacterQuestion), [{"character_id": i % (plays * 50) + 1, "question_id": i + 1}
+                                                       for i in range(questions)])
+        db.session.execute(insert(SceneQuestion), [{"scene_id": i % (plays * 20) + 1, "question_id": i + 1}
+                                                   for i in range(questions)])
+        db.session.commit()
+        db.session.execute("ANALYZE")
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def explain(self, query):
+        """Given a query, return its query plan."""
+
+        statement = query.statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+        return "\n".join(row[0] for row in db.session.execute(f"EXPLAIN {statement}"))
+
+    def assertUsesIndex(self, query, table):
+        plan = self.explain(query)
+        self.assertNotIn(f"Seq Scan on {table}", plan, msg=f"\n{plan}")
+
+    def test_play_lookups_use_indexes(self):
+        self.assertUsesIndex(Character.query.filter_by(play_id=3), "characters")
+        self.assertUsesIndex(Character.query.filter_by(play_id=3, name="Character 42"), "characters")
+        self.assertUsesIndex(Scene.query.filter_by(play_id=3), "scenes")
+        self.assertUsesIndex(Scene.query.filter_by(play_id=3, act=2, scene=1), "scenes")
+        self.assertUsesIndex(Film.query.filter_by(play_id=3), "films")
+        self.assertUsesIndex(Question.query.filter_by(play_id=3), "questions")
+        self.assertUsesIndex(Interpretation.query.filter_by(play_id=3), "interpretations")
+        self.assertUsesIndex(Quote.query.filter_by(play_id=3), "quotes")
+        self.assertUsesIndex(Quote.query.filter_by(scene_id=3), "quotes")
+
+    def test_film_lookups_use_indexes(self):
+        self.assertUsesIndex(CharacterActor.query.filter_by(film_id=7), "character_actors")
+        self.assertUsesIndex(CharacterActor.query.filter_by(character_id=7), "character_actors")
+        self.assertUsesIndex(CharacterActor.query.filter_by(person_id=7, character_id=7, film_id=7), "character_actors")
+        self.assertUsesIndex(PersonJob.query.filter_by(film_id=7), "person_jobs")
+        self.assertUsesIndex(PersonJob.query.filter_by(film_id=7, job_id=2), "person_jobs")
+        self.assertUsesIndex(PersonJob.query.filter_by(job_id=2), "person_jobs")
+        self.assertUsesIndex(PersonJob.query.filter_by(person_id=7), "person_jobs")
+        self.assertUsesIndex(Interpretation.query.filter_by(film_id=7), "interpretations")
+
+    def test_interpretation_and_question_lookups_use_indexes(self):
+        self.assertUsesIndex(CharacterInterpretation.query.filter_by(interpretation_id=7), "character_interpretations")
+        self.assertUsesIndex(CharacterInterpretation.query.filter_by(character_id=7), "character_interpretations")
+        self.assertUsesIndex(SceneInterpretation.query.filter_by(interpretation_id=7), "scene_interpretations")
+        self.assertUsesIndex(CharacterQuestion.query.filter_by(question_id=7), "character_questions")
+        self.assertUsesIndex(SceneQuestion.query.filter_by(question_id=7), "scene_questions")
+        self.assertUsesIndex(Interpretation.query.filter_by(question_id=7), "interpretations")
@@ -0,0 +1,50 @@
+import unittest
+from app import create_app, db
+from app.main.crud import get_random_image
+from app.models import Person, Topic
+from sqlalchemy import event, insert
+
+class RandomPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.execute(insert(Person), [{"moviedb_id": str(i), "fname": "First", "lname": str(i),
+                                             "photo_path": "/photo.jpg" if i % 10 == 0 else None} for i in range(100)])
+        db.session.commit()
+
+        self.queries = 0
+        event.listen(db.engine, "before_cursor_execute", self.count_query)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self.count_query)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def count_query(self, *args):
+        self.queries += 1
+
+    def test_prefers_records_with_images(self):
+        for _ in range(20):
+            self.assertEqual(get_random_image(Person).photo_path, "/photo.jpg")
+
+    def test_one_lookup_per_choice(self):
+        get_random_image(Person)
+        db.session.expunge_all()
+        self.queries = 0
+        for _ in range(10):
+            get_random_image(Person)
+            db.session.expunge_all()
+        self.assertEqual(self.queries, 10)
+
+    def test_pool_refreshes_on_write(self):
+        self.assertIsNone(get_random_image(Topic))
+        db.session.add(Topic(title="Madness", description=""))
+        db.session.commit()
+        self.assertEqual(get_random_image(Topic).title, "Madness")
+
+        Person.query.filter(Person.photo_path != None).delete()
+        db.session.commit()
+        self.assertIsNone(get_random_image(Person).photo_path)
@@ -0,0 +1,57 @@
+import unittest
+from app import create_app, db, request_memo
+from app.main.crud import get_character, get_job_by_title
+from app.models import Job, Play
+from sqlalchemy import event
+
+class RequestMemoTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.play = Play(title="Hamlet", shortname="Ham")
+        db.session.add(self.play)
+        db.session.commit()
+
+        self.queries = 0
+        event.listen(db.engine, "before_cursor_execute", self.count_query)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self.count_query)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def count_query(self, *args):
+        self.queries += 1
+
+    def test_repeated_lookups_cost_no_queries(self):
+        with self.app.test_request_context():
+            actor = get_job_by_title("Actor")
+            hamlet = get_character(name="Hamlet", play=self.play)
+            self.queries = 0
+            for _ in range(5):
+                self.assertIs(get_job_by_title("Actor"), actor)
+                self.assertIs(get_character(name="Hamlet", play=self.play), hamlet)
+            self.assertEqual(self.queries, 0)
+            self.assertEqual(request_memo.stats(), {"hits": 10, "misses": 2})
+
+        with self.app.test_request_context(): # a new request starts with an empty memo
+            self.assertEqual(request_memo.stats(), {"hits": 0, "misses": 0})
+
+    def test_changed_records_are_forgotten(self):
+        with self.app.test_request_context():
+            actor = get_job_by_title("Actor")
+            actor.title = "Performer"
+            self.assertIsNot(get_job_by_title("Actor"), actor)
+            self.assertEqual(Job.query.count(), 2)
+
+    def test_rollback_clears_the_memo(self):
+        with self.app.test_request_context():
+            db.session.begin_nested()
+            get_job_by_title("Actor")
+            db.session.rollback()
+            db.session.rollback()
+            self.assertEqual(get_job_by_title("Actor").title, "Actor")
+            self.assertEqual(request_memo.stats(), {"hits": 0, "misses": 2})
@@ -0,0 +1,72 @@
+import unittest
+from config import config
+from flask import Flask
+from app.response_cache import EVICT_TO, ResponseCache, cache_key
+from unittest import mock
+import os
+import tempfile
+import time
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        app = Flask(__name__)
+        app.config.from_object(config["testing"])
+        app.config["RESPONSE_CACHE_PATH"] = os.path.join(self.cache_dir.name, "responses.sqlite")
+        app.config["RESPONSE_CACHE_MAX_BYTES"] = 1000
+        app.config["RESPONSE_CACHE_TTLS"] = {"folger": 60}
+        self.cache = ResponseCache(app)
+
+    def tearDown(self):
+        self.cache.connection().close()
+        self.cache_dir.cleanup()
+
+    def stored_size(self):
+        return self.cache.connection().execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def test_size_is_kept_up_to_date(self):
+        self.cache.set("https://folgerdigitaltexts.org/Ham/charText/", "a" * 300)
+        self.cache.set("https://folgerdigitaltexts.org/Ham/scenes/", "b" * 200)
+        self.cache.set("https://folgerdigitaltexts.org/Ham/charText/", "c" * 100) # replaced
+        self.assertEqual(self.cache.size(), 300)
+        self.assertEqual(self.cache.size(), self.stored_size())
+
+        self.cache.purge("https://folgerdigitaltexts.org/Ham/scenes/")
+        self.assertEqual(self.cache.size(), 100)
+
+    def test_evicts_least_recently_used_only_when_full(self):
+        for page in range(4):
+            self.cache.set(f"https://folgerdigitaltexts.org/Ham/{page}/", "x" * 240)
+        self.assertIsNotNone(self.cache.get("https://folgerdigitaltexts.org/Ham/0/", "folger"))
+        self.assertEqual(self.cache.size(), 960) # under the limit, nothing evicted
+
+        self.cache.set("https://folgerdigitaltexts.org/Ham/4/", "x" * 240)
+        self.assertLessEqual(self.cache.size(), 900)
+        self.assertEqual(self.cache.size(), self.stored_size())
+        self.assertIsNotNone(self.cache.get("https://folgerdigitaltexts.org/Ham/0/", "folger"))
+        self.assertIsNone(self.cache.get_stale("https://folgerdigitaltexts.org/Ham/1/"))
+
+    def test_evicts_down_below_the_limit_when_a_write_takes_it_over(self):
+        self.cache.set("https://folgerdigitaltexts.org/Ham/0/", "x" * 600)
+        self.cache.set("https://folgerdigitaltexts.org/Ham/1/", "x" * 600)
+        self.assertLessEqual(self.cache.size(), 1000 * EVICT_TO)
+        self.assertIsNone(self.cache.get_stale("https://folgerdigitaltexts.org/Ham/0/"))
+        self.assertIsNotNone(self.cache.get_stale("https://folgerdigitaltexts.org/Ham/1/"))
+
+    def test_entries_expire_after_their_endpoints_ttl(self):
+        url = "https://folgerdigitaltexts.org/Ham/charText/"
+        self.cache.set(url, "page")
+        fetched_at = time.time()
+        with mock.patch("app.response_cache.time.time", return_value=fetched_at + 59):
+            self.assertEqual(self.cache.get(url, "folger"), "page")
+        with mock.patch("app.response_cache.time.time", return_value=fetched_at + 61):
+            self.assertIsNone(self.cache.get(url, "folger"))
+            self.assertIsNone(self.cache.get(url, "moviedb")) # no TTL configured, so never fresh
+        self.assertEqual(self.cache.get_stale(url)[0], "page") # kept for revalidation
+
+    def test_api_key_is_stripped_from_cache_keys(self):
+        self.assertEqual(cache_key("https://api.themoviedb.org/3/movie/10549?language=en&api_key=secret&append=credits"),
+                         "https://api.themoviedb.org/3/movie/10549?append=credits&language=en")
+        self.cache.set("https://api.themoviedb.org/3/movie/10549?api_key=secret", "film")
+        self.assertEqual(self.cache.get_stale("https://api.themoviedb.org/3/movie/10549?api_key=other")[0], "film")
+        self.assertNotIn("secret", "".join(key for key, in self.cache.connection().execute("SELECT key FROM responses")))
@@ -0,0 +1,76 @@
+import unittest
+from unittest import mock
+from app import create_app, db
+from app.main import seed
+from app.main.seed import seed_plays
+from app.main.tasks import import_film
+from app.models import Character, Play, Scene
+import requests
+
+FOLGER_PAGES = {
+    "charText": """<table>
+<tr><td style="width: 60px;">1507</td><td><a href="{shortname}_Lead.html">Lead</a></td></tr>
+<tr><td style="width: 60px;">312</td><td><a href="{shortname}_Servant.html">Servant</a></td></tr>
+</table>""",
+    "scenes": """<p><a href="scene1.html">Act 1, scene 1</a></p>
+<p><a href="scene2.html">Act 1, scene 2</a></p>""",
+    "synopsis": """<p>Act 1, Scene 1: The lead appears.</p>
+<p>Act 1, Scene 2: The servant answers.</p>""",
+}
+
+def get_folger_page(url):
+    shortname, page_name = url.rstrip("/").split("/")[-2:]
+    if shortname == "Mac":
+        raise requests.ConnectionError("Folger is down")
+    return FOLGER_PAGES[page_name].format(shortname=shortname)
+
+
+class SeedPlaysTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def seeded_plays(self):
+        db.session.remove()
+        return {play.shortname: (len(play.characters), len(play.scenes)) for play in Play.query}
+
+    def test_failed_download_skips_only_that_play(self):
+        with mock.patch("app.main.seed.get_folger_page", side_effect=get_folger_page):
+            report = seed_plays(["Ham", "Mac", "Oth"], workers=2)
+        self.assertEqual([row["shortname"] for row in report], ["Ham", "Mac", "Oth"])
+        self.assertEqual(report[0], {"shortname": "Ham", "characters": 2, "scenes": 2})
+        self.assertEqual(report[1], {"shortname": "Mac", "error": "Folger is down"})
+        self.assertEqual(self.seeded_plays(), {"Ham": (2, 2), "Oth": (2, 2)})
+        self.assertEqual(Scene.query.filter_by(act=1, scene=1).first().description, "The lead appears.")
+
+    def test_failed_write_rolls_back_only_that_play(self):
+        bulk_add = seed.bulk_add
+
+        def fail_on_second_plays_scenes(model, rows, index=True):
+            if model is Scene and Play.query.get(rows[0]["play_id"]).shortname == "Oth":
+                raise RuntimeError("scene insert failed")
+            return bulk_add(model, rows, index=index)
+
+        with mock.patch("app.main.seed.get_folger_page", side_effect=get_folger_page), \
+             mock.patch("app.main.seed.bulk_add", side_effect=fail_on_second_plays_scenes):
+            report = seed_plays(["Ham", "Oth", "Rom"], workers=2)
+        self.assertEqual(report[1], {"shortname": "Oth", "error": "scene insert failed"})
+        # Othello's play and characters were written before its scenes failed, and went with them
+        self.assertEqual(self.seeded_plays(), {"Ham": (2, 2), "Rom": (2, 2)})
+        self.assertEqual(Character.query.count(), 4)
+
+    def test_film_import_fails_fast_for_unseeded_play(self):
+        play = Play(title="Macbeth", shortname="Mac")
+        db.session.add(play)
+        db.session.commit()
+        with mock.patch("app.main.tasks.parse_moviedb_film") as parse_moviedb_film, \
+             self.assertRaisesRegex(RuntimeError, "seed this play first"):
+            import_film(mock.Mock(), "10549", play.id)
+        parse_moviedb_film.assert_not_called()
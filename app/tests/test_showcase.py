@@ -0,0 +1,46 @@
+import unittest
+from app import create_app, db, login_manager, showcase
+from app.models import Character, Play, User
+from sqlalchemy import event
+
+class ShowcaseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        play = Play(title="Hamlet", shortname="Ham")
+        db.session.add(play)
+        db.session.flush()
+        self.play_id = play.id
+        db.session.add(Character(name="Hamlet", play_id=play.id))
+        db.session.commit()
+        login_manager.user_loader(lambda user_id: User.query.get(user_id)) # registered by motiveandcue.py outside of tests
+        self.client = self.app.test_client()
+
+        self.queries = 0
+        event.listen(db.engine, "before_cursor_execute", self.count_query)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self.count_query)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def count_query(self, *args):
+        self.queries += 1
+
+    def test_homepage_is_served_from_memory(self):
+        self.assertEqual(self.client.get("/").status_code, 200)
+        self.queries = 0
+        for _ in range(5):
+            response = self.client.get("/")
+            self.assertIn(b"Hamlet", response.data)
+        self.assertEqual(self.queries, 0)
+
+    def test_writes_refresh_the_showcase(self):
+        self.assertEqual(showcase.current()["characters"].name, "Hamlet")
+        db.session.add(Character(name="Yorick", play_id=self.play_id, img="/static/assets/yorick.jpg"))
+        db.session.commit()
+        self.assertEqual(showcase.current()["characters"].name, "Yorick") # the only character with an image
+        self.assertIsNone(showcase.current()["films"])
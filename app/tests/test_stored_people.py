@@ -0,0 +1,28 @@
+import unittest
+from app import create_app, db
+from app.main.moviedb_parser import get_stored_people
+from app.models import Person
+from datetime import datetime, timedelta
+
+class StoredPeopleTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        stale_days = self.app.config["PERSON_STALE_DAYS"]
+        db.session.add_all([Person(moviedb_id="1", fname="Fresh", lname="Person"),
+                            Person(moviedb_id="2", fname="Stale", lname="Person",
+                                   last_updated=datetime.now() - timedelta(days=stale_days + 1)),
+                            Person(moviedb_id="3", fname="Untracked", lname="Person")])
+        db.session.commit()
+        Person.query.filter_by(moviedb_id="3").update({"last_updated": None}) # stored before last_updated existed
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_only_fresh_people_are_stored(self):
+        self.assertEqual(list(get_stored_people([1, 2, 3, 4])), [1])
@@ -0,0 +1,105 @@
+import unittest
+from unittest import mock
+from app import create_app, db
+from app.models import BackgroundTask
+from app.tasks import TaskQueue
+from datetime import datetime, timedelta
+import threading
+import time
+
+class TaskQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("testing")
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.queue = TaskQueue(self.app)
+        self.queue.executor = mock.Mock() # run tasks by hand instead of on the worker pool
+        self.runs = []
+
+        @self.queue.handler("count")
+        def count(task):
+            self.runs.append(task.id)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_task(self, status, **columns):
+        task = BackgroundTask(name="count", status=status, **columns)
+        db.session.add(task)
+        db.session.commit()
+        return task.id
+
+    def test_task_runs_once_when_submitted_twice(self):
+        task_id = self.add_task(BackgroundTask.QUEUED)
+        self.queue.run(self.app, task_id)
+        self.queue.run(self.app, task_id)
+        self.assertEqual(self.runs, [task_id])
+        self.assertEqual(BackgroundTask.query.get(task_id).status, BackgroundTask.COMPLETE)
+
+    def test_task_deleted_after_it_was_queued_is_skipped(self):
+        task_id = self.add_task(BackgroundTask.QUEUED)
+
+        def claim_then_delete(task_id):
+            claimed = TaskQueue.claim(self.queue, task_id)
+            BackgroundTask.query.filter_by(id=task_id).delete()
+            db.session.commit()
+            return claimed
+
+        with mock.patch.object(self.queue, "claim", side_effect=claim_then_delete):
+            self.queue.run(self.app, task_id)
+        self.assertEqual(self.runs, [])
+
+    def test_task_leased_to_a_live_process_is_left_alone(self):
+        task_id = self.add_task(BackgroundTask.RUNNING, owner="other-host:1", lease_expires_at=datetime.now() + timedelta(minutes=1))
+        self.queue.resume_unfinished()
+        self.queue.run(self.app, task_id)
+        self.assertEqual(self.queue.executor.submit.call_count, 0)
+        self.assertEqual(self.runs, [])
+
+    def test_task_with_expired_lease_is_resumed(self):
+        task_id = self.add_task(BackgroundTask.RUNNING, owner="other-host:1", lease_expires_at=datetime.now() - timedelta(seconds=1))
+        self.queue.resume_unfinished()
+        self.assertEqual(self.queue.executor.submit.call_count, 1)
+        self.queue.run(self.app, task_id)
+        self.assertEqual(self.runs, [task_id])
+
+    def test_lease_is_renewed_while_the_task_runs(self):
+        self.queue.lease = timedelta(seconds=0.3)
+
+        @self.queue.handler("slow")
+        def slow(task):
+            time.sleep(0.6) # twice the lease
+            db.session.commit() # see the heartbeat's renewals
+            return BackgroundTask.query.filter(BackgroundTask.id == task.id, self.queue.claimable()).count()
+
+        task = BackgroundTask(name="slow", status=BackgroundTask.QUEUED)
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+        self.queue.run(self.app, task_id)
+        self.assertEqual(BackgroundTask.query.get(task_id).get_result(), 0)
+
+    def test_two_processes_race_for_an_abandoned_task(self):
+        task_id = self.add_task(BackgroundTask.RUNNING, owner="other-host:1", lease_expires_at=datetime.now() - timedelta(seconds=1))
+        other_process = TaskQueue(self.app)
+        other_process.handlers = self.queue.handlers
+        both_ready = threading.Barrier(2, timeout=10)
+
+        def resume(queue):
+            with self.app.app_context():
+                both_ready.wait()
+                queue.run(self.app, task_id) # each thread has its own session and connection
+
+        workers = [threading.Thread(target=resume, args=(queue,)) for queue in (self.queue, other_process)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(self.runs, [task_id])
+        db.session.remove()
+        self.assertEqual(BackgroundTask.query.get(task_id).status, BackgroundTask.COMPLETE)
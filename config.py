@@ -1,4 +1,5 @@
 import os
+import tempfile
 basedir = os.path.abspath(os.path.dirname(__file__))
 
 class Config:
@@ -9,6 +10,44 @@ class Config:
     SQLALCHEMY_POOL_RECYCLE = 54000 #Recycle connection pool every 15 minutes
     SQLALCHEMY_POOL_SIZE = 10
     GOOGLE_SEARCH_API_KEY = os.environ.get("GOOGLE_SEARCH_API_KEY")
+    MOVIEDB_MAX_WORKERS = int(os.environ.get("MOVIEDB_MAX_WORKERS", 8)) # Concurrent MovieDB person lookups per film import
+    FOLGER_MAX_WORKERS = int(os.environ.get("FOLGER_MAX_WORKERS", 4)) # Concurrent Folger page downloads when seeding plays
+    TASK_WORKERS = int(os.environ.get("TASK_WORKERS", 2)) # Background tasks (film imports) run at once
+    TASK_LEASE = int(os.environ.get("TASK_LEASE", 60)) # Seconds a process's claim on a running task lasts unless renewed
+    PERSON_STALE_DAYS = int(os.environ.get("PERSON_STALE_DAYS", 180)) # Re-fetch stored people from MovieDB after this many days
+    PLAY_CATALOG_TTL = int(os.environ.get("PLAY_CATALOG_TTL", 60 * 60)) # Reload the cached plays this often, for changes made by other processes
+    RANDOM_POOL_TTL = int(os.environ.get("RANDOM_POOL_TTL", 10 * 60)) # Reload the ids random records are picked from this often, likewise
+    SHOWCASE_SIZE = int(os.environ.get("SHOWCASE_SIZE", 12)) # Featured records of each kind the homepage rotates through
+    SHOWCASE_ROTATE = int(os.environ.get("SHOWCASE_ROTATE", 60)) # Seconds each featured record stays on the homepage
+    SHOWCASE_REFRESH = int(os.environ.get("SHOWCASE_REFRESH", 60 * 60)) # Pick new featured records this often (and after writes)
+
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3.05))
+    HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 15))
+    HTTP_MAX_ATTEMPTS = int(os.environ.get("HTTP_MAX_ATTEMPTS", 5)) # Attempts for connection errors, timeouts, 429 and 5xx responses
+    HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5)) # Retries sleep up to 0.5s, 1s, 2s...
+    HTTP_BACKOFF_MAX = float(os.environ.get("HTTP_BACKOFF_MAX", 30))
+    HTTP_BREAKER_THRESHOLD = int(os.environ.get("HTTP_BREAKER_THRESHOLD", 10)) # Consecutive failures before a host is cut off
+    HTTP_BREAKER_RESET = float(os.environ.get("HTTP_BREAKER_RESET", 30)) # Seconds before a cut-off host is tried again
+    HTTP_RECORD_DIR = os.environ.get("HTTP_RECORD_DIR") # Save every external API response here as a fixture file
+    HTTP_REPLAY_DIR = os.environ.get("HTTP_REPLAY_DIR") # Answer external API requests from fixtures saved here, offline
+    HTTP_REPLAY_LATENCY = float(os.environ.get("HTTP_REPLAY_LATENCY", 0)) # Seconds added to each replayed response...
+    HTTP_REPLAY_JITTER = float(os.environ.get("HTTP_REPLAY_JITTER", 0)) # ...plus up to this many seconds at random
+    HTTP_RATE_LIMITS = { # (requests per second, burst size) per external host
+        "api.themoviedb.org": (float(os.environ.get("MOVIEDB_RATE_LIMIT", 40)), 20),
+    }
+    HTTP_POOL_SIZES = { # Keep-alive connections held open per external host
+        "api.themoviedb.org": MOVIEDB_MAX_WORKERS,
+        "folgerdigitaltexts.org": FOLGER_MAX_WORKERS,
+    }
+
+    FOLGER_SNAPSHOT_PATH = os.environ.get("FOLGER_SNAPSHOT_PATH") or os.path.join(basedir, "data", "folger-snapshot.json.gz")
+    RESPONSE_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH") or os.path.join(basedir, "cache", "responses.sqlite")
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+    RESPONSE_CACHE_TTLS = { # Seconds a cached response stays fresh, by endpoint
+        "movie": 60 * 60 * 24,
+        "person": 60 * 60 * 24 * 30,
+        "folger": 60 * 60 * 24 * 365, # the texts essentially never change; stale pages are revalidated, not refetched
+    }
 
     CLOUDINARY_KEY = os.environ.get("CLOUDINARY_KEY")
     CLOUDINARY_KEY_SECRET = os.environ.get("CLOUDINARY_KEY_SECRET")
@@ -38,6 +77,7 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.environ.get("TEST_DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATION = False
+    RESPONSE_CACHE_PATH = os.path.join(tempfile.gettempdir(), f"motiveandcue-test-responses-{os.getpid()}.sqlite") # Keep tests out of the real cache
 
 class ProductionConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
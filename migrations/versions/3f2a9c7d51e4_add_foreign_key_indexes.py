@@ -0,0 +1,103 @@
+"""add foreign key indexes and association table unique constraints
+
+Revision ID: 3f2a9c7d51e4
+Revises: 7c4d2b9e8f10
+Create Date: 2026-10-18 10:12:41.305918
+
+Databases created with db.create_all() before this revision have no indexes on their foreign keys, and the
+association tables' primary keys all start with their id column, so every lookup by play, film, character or scene
+read the whole table. It checks what already exists, so it can be run against databases created with db.create_all()
+(and stamped with the initial revision) both before and after the indexes were added to the models.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c7d51e4'
+down_revision = '7c4d2b9e8f10'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ("ix_character_actors_character_id", "character_actors", ["character_id"]),
+    ("ix_character_actors_film_id", "character_actors", ["film_id"]),
+    ("ix_character_interpretations_interpretation_id", "character_interpretations", ["interpretation_id"]),
+    ("ix_character_questions_question_id", "character_questions", ["question_id"]),
+    ("ix_character_quotes_quote_id", "character_quotes", ["quote_id"]),
+    ("ix_character_quotes_scene_id", "character_quotes", ["scene_id"]),
+    ("ix_character_scenes_scene_id", "character_scenes", ["scene_id"]),
+    ("ix_character_topics_topic_id", "character_topics", ["topic_id"]),
+    ("ix_person_jobs_film_id_job_id", "person_jobs", ["film_id", "job_id"]),
+    ("ix_person_jobs_job_id", "person_jobs", ["job_id"]),
+    ("ix_scene_interpretations_interpretation_id", "scene_interpretations", ["interpretation_id"]),
+    ("ix_scene_questions_question_id", "scene_questions", ["question_id"]),
+    ("ix_scene_topics_topic_id", "scene_topics", ["topic_id"]),
+    ("ix_films_play_id", "films", ["play_id"]),
+    ("ix_interpretations_play_id", "interpretations", ["play_id"]),
+    ("ix_interpretations_film_id", "interpretations", ["film_id"]),
+    ("ix_interpretations_question_id", "interpretations", ["question_id"]),
+    ("ix_questions_play_id", "questions", ["play_id"]),
+    ("ix_quotes_play_id", "quotes", ["play_id"]),
+    ("ix_quotes_scene_id", "quotes", ["scene_id"]),
+]
+
+# (constraint name, table, columns); get_or_create() relies on these to find at most one record
+UNIQUE_CONSTRAINTS = [
+    ("character_actors_person_character_film_key", "character_actors", ["person_id", "character_id", "film_id"]),
+    ("character_interpretations_character_interpretation_key", "character_interpretations",
+     ["character_id", "interpretation_id"]),
+    ("character_questions_character_question_key", "character_questions", ["character_id", "question_id"]),
+    ("character_quotes_character_quote_key", "character_quotes", ["character_id", "quote_id"]),
+    ("character_scenes_character_scene_key", "character_scenes", ["character_id", "scene_id"]),
+    ("character_topics_character_topic_key", "character_topics", ["character_id", "topic_id"]),
+    ("person_jobs_person_film_job_key", "person_jobs", ["person_id", "film_id", "job_id"]),
+    ("scene_interpretations_scene_interpretation_key", "scene_interpretations", ["scene_id", "interpretation_id"]),
+    ("scene_questions_scene_question_key", "scene_questions", ["scene_id", "question_id"]),
+    ("scene_topics_scene_topic_key", "scene_topics", ["scene_id", "topic_id"]),
+    ("characters_play_name_key", "characters", ["play_id", "name"]),
+    ("scenes_play_act_scene_key", "scenes", ["play_id", "act", "scene"]),
+    ("plays_shortname_key", "plays", ["shortname"]),
+]
+
+# Other tables point at characters, scenes and plays, so their duplicates can't simply be deleted; if there are any,
+# creating the constraint fails and names the duplicated values, to be merged by hand.
+REFERENCED_TABLES = {"characters", "scenes", "plays"}
+
+
+def existing_indexes(inspector, table):
+    """Given an inspector and a table name, return the column lists of the table's indexes and unique constraints."""
+
+    columns = [index["column_names"] for index in inspector.get_indexes(table)]
+    columns += [constraint["column_names"] for constraint in inspector.get_unique_constraints(table)]
+    return columns
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    for name, table, columns in UNIQUE_CONSTRAINTS:
+        if columns in existing_indexes(inspector, table):
+            continue
+        if table not in REFERENCED_TABLES:
+            # Keep the oldest of any duplicate rows, which is the one get_or_create() has been returning
+            matches = " AND ".join(f"newer.{column} = older.{column}" for column in columns)
+            op.execute(f"DELETE FROM {table} AS newer USING {table} AS older WHERE {matches} AND newer.id > older.id")
+        op.create_unique_constraint(name, table, columns)
+
+    for name, table, columns in INDEXES:
+        if columns not in existing_indexes(inspector, table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    # The unique constraints stay: the models declared most of them before this revision, and dropping them would
+    # only let duplicate rows back in.
+    inspector = sa.inspect(op.get_bind())
+
+    for name, table, columns in INDEXES:
+        if name in [index["name"] for index in inspector.get_indexes(table)]:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,31 @@
+"""add background task leases
+
+Revision ID: 5e7b1c9d3a28
+Revises: 9d1f3a7e2b64
+Create Date: 2026-10-18 19:12:44.507391
+
+Tasks already running have no owner or lease, so the next process to start treats them as abandoned and resumes them.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7b1c9d3a28'
+down_revision = '9d1f3a7e2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('background_tasks')]
+    if 'owner' not in columns:
+        op.add_column('background_tasks', sa.Column('owner', sa.String(length=100), nullable=True))
+    if 'lease_expires_at' not in columns:
+        op.add_column('background_tasks', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('background_tasks', 'lease_expires_at')
+    op.drop_column('background_tasks', 'owner')
@@ -0,0 +1,46 @@
+"""add background_tasks
+
+Revision ID: 7c4d2b9e8f10
+Revises: 1b8e4f0a6c2d
+Create Date: 2026-10-18 16:05:40.112093
+
+Databases created with db.create_all() after the task queue was added already have the table, so it's only created
+when missing.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4d2b9e8f10'
+down_revision = '1b8e4f0a6c2d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('background_tasks'):
+        return
+
+    op.create_table('background_tasks',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('params', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('progress_done', sa.Integer(), nullable=False),
+    sa.Column('progress_total', sa.Integer(), nullable=False),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_background_tasks_status'), 'background_tasks', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_background_tasks_status'), table_name='background_tasks')
+    op.drop_table('background_tasks')
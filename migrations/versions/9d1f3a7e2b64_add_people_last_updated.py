@@ -0,0 +1,29 @@
+"""add people.last_updated
+
+Revision ID: 9d1f3a7e2b64
+Revises: 3f2a9c7d51e4
+Create Date: 2026-10-18 16:40:03.871452
+
+Existing people are left with a NULL last_updated on purpose: nothing records when their details were last checked
+against MovieDB, so get_stored_people() treats them as stale and the next import that credits them fetches them once.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d1f3a7e2b64'
+down_revision = '3f2a9c7d51e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('people')]
+    if 'last_updated' not in columns:
+        op.add_column('people', sa.Column('last_updated', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('people', 'last_updated')
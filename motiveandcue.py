@@ -1,12 +1,14 @@
 
+import click
 import os
-from app import create_app, db, login_manager
-from app.main.crud import get_user
+from app import create_app, db, login_manager, response_cache
+from app.main.crud import get_user, PART_POLICIES
 from app.models import *
 from flask import render_template
 from flask_login import LoginManager, login_required, set_login_view
 from flask_mail import Message
 from threading import Thread
+import time
 
 app = create_app(os.getenv('FLASK_CONFIG') or "default")
 app.app_context().push()
@@ -57,4 +59,112 @@ def test():
     """Run the unit tests."""
     import unittest
     tests = unittest.TestLoader().discover("app/tests")
-    unittest.TextTestRunner(verbosity=2).run(tests)
\ No newline at end of file
+    unittest.TextTestRunner(verbosity=2).run(tests)
+
+
+@app.cli.command("purge-cache")
+@click.option("--prefix", default=None, help="Only purge cached URLs starting with this prefix.")
+def purge_cache(prefix):
+    """Delete cached external API responses."""
+
+    deleted = response_cache.purge(prefix)
+    print(f"Purged {deleted} cached responses.")
+
+
+@app.cli.command("import-films")
+@click.argument("film_list", type=click.Path(exists=True, dir_okay=False))
+@click.option("--workers", default=4, show_default=True, help="Films fetched from MovieDB at once.")
+@click.option("--parts", "part_policy", type=click.Choice(PART_POLICIES), default="close", show_default=True,
+                help="How credited parts are matched to the play's characters; unmatched parts are skipped, or added as new characters with \"create\".")
+def import_films_command(film_list, workers, part_policy):
+    """Import the films listed in FILM_LIST, one 'MovieDB ID or URL, play shortname' pair per line."""
+
+    from app.main.bulk_import import import_films, read_film_list
+
+    films, bad_lines = read_film_list(film_list)
+    for number, line, error in bad_lines:
+        print(f"SKIPPED line {number}: {error}: {line}")
+    start = time.perf_counter()
+    report = import_films(films, workers=workers, part_policy=part_policy)
+    total_time = time.perf_counter() - start
+
+    failures = [row for row in report if "error" in row]
+    for row in report:
+        timing = f"fetch {row.get('fetch_time', 0):6.2f}s  write {row.get('write_time', 0):6.2f}s"
+        if "error" in row:
+            print(f"FAILED  {row['moviedb_id']:>8} {row['play']:<4} {timing}  {row['error']}")
+        else:
+            print(f"OK      {row['moviedb_id']:>8} {row['play']:<4} {timing}  {row['title']} ({row['people']} people)")
+    print(f"Imported {len(report) - len(failures)} of {len(films)} films in {total_time:.2f}s; {len(failures)} failed.")
+
+
+@app.cli.command("seed-plays")
+@click.argument("shortnames", nargs=-1)
+@click.option("--workers", default=None, type=int, help="Folger pages downloaded at once (default: FOLGER_MAX_WORKERS).")
+def seed_plays_command(shortnames, workers):
+    """Seed the characters and scenes of every play (or SHORTNAMES) from the Folger Digital Texts."""
+
+    from app.main.seed import seed_plays
+
+    start = time.perf_counter()
+    report = seed_plays(shortnames, workers=workers)
+    total_time = time.perf_counter() - start
+
+    failures = [row for row in report if "error" in row]
+    for row in report:
+        if "error" in row:
+            print(f"FAILED  {row['shortname']:<4} {row['error']}")
+        else:
+            print(f"OK      {row['shortname']:<4} {row['characters']:>3} characters, {row['scenes']:>3} scenes added")
+    print(f"Seeded {len(report) - len(failures)} of {len(report)} plays in {total_time:.2f}s; {len(failures)} failed.")
+
+
+@app.cli.command("export-folger-snapshot")
+@click.argument("path", required=False)
+@click.option("--workers", default=None, type=int, help="Folger pages downloaded at once (default: FOLGER_MAX_WORKERS).")
+def export_folger_snapshot_command(path, workers):
+    """Save every play's parsed Folger characters and scenes to PATH (default: FOLGER_SNAPSHOT_PATH)."""
+
+    from app.main.seed import export_folger_snapshot
+
+    path = path or app.config["FOLGER_SNAPSHOT_PATH"]
+    play_count = export_folger_snapshot(path, workers=workers)
+    print(f"Saved {play_count} plays to {path}.")
+
+
+@app.cli.command("load-folger-snapshot")
+@click.argument("path", required=False)
+def load_folger_snapshot_command(path):
+    """Seed every play's characters and scenes from a Folger snapshot at PATH (default: FOLGER_SNAPSHOT_PATH)."""
+
+    from app.main.seed import load_folger_snapshot
+
+    path = path or app.config["FOLGER_SNAPSHOT_PATH"]
+    report = load_folger_snapshot(path)
+    print(f"Loaded {report['plays']} plays from {path} in {report['load_time']:.2f}s: {report['characters']} characters, "
+          f"{report['scenes']} scenes added; search index updated in {report['index_time']:.2f}s.")
+
+
+@app.cli.command("bench-folger")
+@click.argument("shortnames", nargs=-1)
+@click.option("--repeat", default=5, show_default=True, help="Runs per page; the best time is reported.")
+def bench_folger_command(shortnames, repeat):
+    """Time the Folger page extractors against the BeautifulSoup implementation on every play (or SHORTNAMES)."""
+
+    from app.main.folger_benchmark import benchmark_folger_parsers
+    from app.main.forms import play_titles
+
+    report = benchmark_folger_parsers(shortnames or play_titles.keys(), repeat=repeat)
+
+    for row in report:
+        result = "OK" if row["match"] else "MISMATCH"
+        print(f"{result:<9}{row['shortname']:<4} {row['page']:<10} {row['items']:>4} items  "
+              f"soup {row['soup_time'] * 1000:8.2f}ms  fast {row['fast_time'] * 1000:8.2f}ms  "
+              f"{row['soup_time'] / row['fast_time']:6.1f}x")
+    soup_total = sum(row["soup_time"] for row in report)
+    fast_total = sum(row["fast_time"] for row in report)
+    mismatches = [row for row in report if not row["match"]]
+    print(f"Total: soup {soup_total * 1000:.1f}ms, fast {fast_total * 1000:.1f}ms ({soup_total / fast_total:.1f}x faster); "
+          f"{len(mismatches)} of {len(report)} pages differ.")
+    if mismatches:
+        raise click.ClickException("The fast extractors don't match the BeautifulSoup output.")